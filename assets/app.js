@@ -0,0 +1,648 @@
+const chartCache = {};
+const datasetCache = {};
+const SEARCH_DEBOUNCE_MS = 120;
+const SEARCH_RESULT_LIMIT = 50;
+let searchIndex = null;
+let searchTimer = null;
+let chartBundleIndex = null;
+let chartBundleBuffer = null;
+
+const chartModal = document.getElementById('chartModal');
+const chartTitle = document.getElementById('chartTitle');
+const chartSubtitle = document.getElementById('chartSubtitle');
+const chartState = document.getElementById('chartState');
+const chartContainer = document.getElementById('chartContainer');
+const chartTabs = Array.from(document.querySelectorAll('.chart-tab'));
+const chartClose = document.getElementById('chartClose');
+
+let chartInstance = null;
+let candleSeries = null;
+let activeChartTicker = null;
+let activeChartRange = 'day';
+
+function switchView(view) {
+    const isWeekly = view === 'weekly';
+
+    document.getElementById('dailySummary').classList.toggle('hidden', isWeekly);
+    document.getElementById('weeklySummary').classList.toggle('hidden', !isWeekly);
+    document.getElementById('dailyDownloads').classList.toggle('hidden', isWeekly);
+    document.getElementById('weeklyDownloads').classList.toggle('hidden', !isWeekly);
+    document.getElementById('dailyTables').classList.toggle('hidden', isWeekly);
+    document.getElementById('weeklyTables').classList.toggle('hidden', !isWeekly);
+
+    document.getElementById('dailyTab').classList.toggle('active', !isWeekly);
+    document.getElementById('weeklyTab').classList.toggle('active', isWeekly);
+
+    document.getElementById('subtitle').textContent = isWeekly ? WEEKLY_SUBTITLE : DAILY_SUBTITLE;
+    document.getElementById('updateText').textContent = isWeekly ? WEEKLY_UPDATE_TEXT : DAILY_UPDATE_TEXT;
+}
+
+function setChartState(message) {
+    chartState.textContent = message;
+    chartState.classList.remove('hidden');
+}
+
+function clearChartState() {
+    chartState.classList.add('hidden');
+}
+
+function ensureChart() {
+    if (typeof LightweightCharts === 'undefined') {
+        setChartState('Chart library unavailable.');
+        return false;
+    }
+
+    try {
+        if (!chartInstance) {
+            // Use fallback dimensions if container not yet laid out
+            const width = chartContainer.clientWidth || 800;
+            const height = chartContainer.clientHeight || 360;
+
+            chartInstance = LightweightCharts.createChart(chartContainer, {
+                layout: {
+                    background: { type: 'solid', color: 'transparent' },
+                    textColor: '#cfd3dc',
+                    fontFamily: 'JetBrains Mono, monospace',
+                },
+                grid: {
+                    vertLines: { color: 'rgba(255, 255, 255, 0.06)' },
+                    horzLines: { color: 'rgba(255, 255, 255, 0.06)' },
+                },
+                rightPriceScale: { borderVisible: false },
+                timeScale: { borderVisible: false },
+                width: width,
+                height: height,
+            });
+
+            candleSeries = chartInstance.addCandlestickSeries({
+                upColor: '#00ff88',
+                downColor: '#ff3366',
+                borderUpColor: '#00cc6a',
+                borderDownColor: '#cc2952',
+                wickUpColor: '#00cc6a',
+                wickDownColor: '#cc2952',
+            });
+        } else {
+            // Update dimensions for existing chart
+            const width = chartContainer.clientWidth || 800;
+            const height = chartContainer.clientHeight || 360;
+            chartInstance.applyOptions({ width: width, height: height });
+        }
+
+        return true;
+    } catch (e) {
+        console.error('Chart creation error:', e);
+        setChartState('Chart initialization failed.');
+        return false;
+    }
+}
+
+function seriesLength(series) {
+    if (!series) {
+        return 0;
+    }
+    // Columnar payloads hold parallel t/o/h/l/c arrays per range
+    return Array.isArray(series) ? series.length : (series.t || []).length;
+}
+
+function normalizeChartData(series) {
+    const sanitized = [];
+    const columnar = !Array.isArray(series);
+    const count = seriesLength(series);
+    for (let i = 0; i < count; i++) {
+        const bar = columnar
+            ? { time: series.t[i], open: series.o[i], high: series.h[i], low: series.l[i], close: series.c[i] }
+            : series[i];
+        if (!bar) {
+            continue;
+        }
+
+        let timeValue = bar.time;
+        if (typeof timeValue === 'string') {
+            const parts = timeValue.split('-').map(Number);
+            timeValue = Date.UTC(parts[0], parts[1] - 1, parts[2]) / 1000;
+        }
+
+        const open = Number(bar.open);
+        const high = Number(bar.high);
+        const low = Number(bar.low);
+        const close = Number(bar.close);
+
+        if (!Number.isFinite(timeValue) || !Number.isFinite(open) || !Number.isFinite(high) || !Number.isFinite(low) || !Number.isFinite(close)) {
+            continue;
+        }
+
+        const maxBody = Math.max(open, close);
+        const minBody = Math.min(open, close);
+        const fixedHigh = Math.max(high, maxBody);
+        const fixedLow = Math.min(low, minBody);
+
+        sanitized.push({
+            time: timeValue,
+            open,
+            high: fixedHigh,
+            low: fixedLow,
+            close,
+        });
+    }
+
+    sanitized.sort((a, b) => a.time - b.time);
+    const deduped = [];
+    let lastTime = null;
+    sanitized.forEach(bar => {
+        if (bar.time === lastTime) {
+            deduped[deduped.length - 1] = bar;
+            return;
+        }
+        deduped.push(bar);
+        lastTime = bar.time;
+    });
+
+    return deduped;
+}
+
+function renderChartData(payload, range) {
+    if (!candleSeries || !chartInstance) {
+        console.error('Chart not initialized');
+        setChartState('Chart not initialized.');
+        return;
+    }
+
+    const series = payload && payload[range] ? payload[range] : [];
+    console.log(`Rendering ${range} data: ${seriesLength(series)} candles`);
+
+    if (!seriesLength(series)) {
+        setChartState('No ' + range + ' data available.');
+        candleSeries.setData([]);
+        return;
+    }
+
+    clearChartState();
+    const normalized = normalizeChartData(series);
+    console.log(`Normalized data: ${normalized.length} candles`);
+
+    if (!normalized.length) {
+        setChartState('No valid chart data after normalization.');
+        candleSeries.setData([]);
+        return;
+    }
+
+    candleSeries.setData(normalized);
+    chartInstance.timeScale().fitContent();
+}
+
+function loadChartIndex() {
+    if (!chartBundleIndex) {
+        chartBundleIndex = fetch(CHART_INDEX_URL)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Chart index not found');
+                }
+                return response.json();
+            })
+            .catch(error => {
+                chartBundleIndex = null;
+                throw error;
+            });
+    }
+    return chartBundleIndex;
+}
+
+function decodeBundleSlice(buffer, offset, length) {
+    return JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, offset, length)));
+}
+
+function loadBundledChart(ticker) {
+    return loadChartIndex().then(index => {
+        const entry = index.tickers[ticker];
+        if (!entry) {
+            throw new Error('Chart not found');
+        }
+        const [offset, length] = entry;
+        if (chartBundleBuffer) {
+            return decodeBundleSlice(chartBundleBuffer, offset, length);
+        }
+
+        const url = `data/charts/${index.bundle}?v=${index.version}`;
+        return fetch(url, { headers: { Range: `bytes=${offset}-${offset + length - 1}` } })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Chart bundle unavailable');
+                }
+                return response.arrayBuffer().then(buffer => {
+                    if (response.status === 206) {
+                        return decodeBundleSlice(buffer, 0, buffer.byteLength);
+                    }
+                    // Server ignored the Range header: keep the whole bundle for later clicks
+                    chartBundleBuffer = buffer;
+                    return decodeBundleSlice(buffer, offset, length);
+                });
+            });
+    });
+}
+
+function loadChartData(ticker) {
+    if (chartCache[ticker]) {
+        return Promise.resolve(chartCache[ticker]);
+    }
+
+    setChartState('Loading chart data...');
+    const request = CHART_BUNDLE
+        ? loadBundledChart(ticker)
+        : fetch(`data/charts/${encodeURIComponent(ticker)}.json`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Chart not found');
+                }
+                return response.json();
+            });
+    return request
+        .then(payload => {
+            chartCache[ticker] = payload;
+            return payload;
+        });
+}
+
+function getTimeframeLabel(range) {
+    const labels = {
+        'm15': '15-Minute Candles',
+        'h1': '1-Hour Candles',
+        'h2': '2-Hour Candles',
+        'h3': '3-Hour Candles',
+        'day': 'Daily Candles',
+        'week': 'Weekly Candles',
+        'month': 'Monthly Candles'
+    };
+    return labels[range] || 'Candlestick Chart';
+}
+
+function setActiveChartRange(range) {
+    activeChartRange = range;
+    chartTabs.forEach(tab => {
+        tab.classList.toggle('active', tab.dataset.range === range);
+    });
+
+    // Update subtitle based on selected timeframe
+    chartSubtitle.textContent = getTimeframeLabel(range);
+
+    if (activeChartTicker && chartCache[activeChartTicker]) {
+        renderChartData(chartCache[activeChartTicker], activeChartRange);
+    }
+}
+
+
+function openChart(ticker) {
+    activeChartTicker = ticker;
+    chartTitle.textContent = `${ticker} Candlesticks`;
+    chartSubtitle.textContent = getTimeframeLabel(activeChartRange);
+    chartModal.classList.remove('hidden');
+    setChartState('Loading chart...');
+
+
+    // Use requestAnimationFrame to ensure DOM is laid out before creating chart
+    requestAnimationFrame(() => {
+        if (!ensureChart()) {
+            return;
+        }
+        setActiveChartRange(activeChartRange);
+        loadChartData(ticker)
+            .then(payload => {
+                try {
+                    renderChartData(payload, activeChartRange);
+                } catch (renderErr) {
+                    console.error('Chart render error:', renderErr);
+                    setChartState('Chart render failed: ' + renderErr.message);
+                }
+            })
+            .catch(error => {
+                console.error('Chart load error:', error);
+                setChartState('Chart data unavailable: ' + error.message);
+            });
+    });
+}
+
+function closeChart() {
+    chartModal.classList.add('hidden');
+}
+
+function bindChartRows() {
+    const rows = document.querySelectorAll('.clickable-row');
+    rows.forEach(row => {
+        const ticker = row.dataset.ticker;
+        if (!ticker) {
+            return;
+        }
+        row.addEventListener('click', () => openChart(ticker));
+        row.addEventListener('keydown', event => {
+            if (event.key === 'Enter' || event.key === ' ') {
+                event.preventDefault();
+                openChart(ticker);
+            }
+        });
+    });
+}
+
+// Same normalization as _search_key() in generate_site.py
+function searchKey(text) {
+    return text.toUpperCase().replace(/[^A-Z0-9]/g, '');
+}
+
+function trigrams(key) {
+    const grams = new Set();
+    for (let i = 0; i + 3 <= key.length; i++) {
+        grams.add(key.slice(i, i + 3));
+    }
+    return grams;
+}
+
+function loadSearchIndex() {
+    if (!searchIndex) {
+        searchIndex = loadDataset('search')
+            .then(raw => ({
+                ...raw,
+                keys: raw.symbols.map(searchKey),
+                nameKeys: raw.names.map(searchKey),
+                charts: new Set(raw.charts),
+                decoded: {},
+            }))
+            .catch(error => {
+                searchIndex = null;
+                throw error;
+            });
+    }
+    return searchIndex;
+}
+
+function postings(index, gram) {
+    if (!(gram in index.decoded)) {
+        const deltas = index.trigrams[gram] || [];
+        const rows = new Array(deltas.length);
+        let row = 0;
+        deltas.forEach((delta, i) => {
+            row += delta;
+            rows[i] = row;
+        });
+        index.decoded[gram] = rows;
+    }
+    return index.decoded[gram];
+}
+
+function searchRows(index, key) {
+    const { keys } = index;
+
+    // Symbol prefix matches: rows are sorted by key, so they are one contiguous run
+    let lo = 0;
+    let hi = keys.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (keys[mid] < key) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+    const matches = [];
+    for (let row = lo; row < keys.length && keys[row].startsWith(key); row++) {
+        matches.push(row);
+    }
+
+    // Substring matches in symbols and names: intersect trigram postings, then verify
+    if (key.length >= 3) {
+        const lists = Array.from(trigrams(key), gram => postings(index, gram))
+            .sort((a, b) => a.length - b.length);
+        const seen = new Set(matches);
+        lists[0].forEach(row => {
+            if (seen.has(row) || !lists.every(list => list === lists[0] || hasRow(list, row))) {
+                return;
+            }
+            if (keys[row].includes(key) || (index.nameKeys[row] || '').includes(key)) {
+                matches.push(row);
+            }
+        });
+    }
+    return matches;
+}
+
+function hasRow(sortedRows, row) {
+    let lo = 0;
+    let hi = sortedRows.length - 1;
+    while (lo <= hi) {
+        const mid = (lo + hi) >> 1;
+        if (sortedRows[mid] === row) {
+            return true;
+        }
+        if (sortedRows[mid] < row) {
+            lo = mid + 1;
+        } else {
+            hi = mid - 1;
+        }
+    }
+    return false;
+}
+
+function formatPct(value) {
+    if (value === null || value === undefined) {
+        return ['—', ''];
+    }
+    return [(value >= 0 ? '+' : '') + value.toFixed(2) + '%', value >= 0 ? 'positive' : 'negative'];
+}
+
+function searchCell(tr, text, className) {
+    const td = document.createElement('td');
+    td.textContent = text;
+    if (className) {
+        td.className = className;
+    }
+    tr.appendChild(td);
+}
+
+function renderSearchResults(index, rows, query) {
+    const table = document.getElementById('searchResultsTable');
+    const tbody = table.querySelector('tbody');
+    const shown = rows.slice(0, SEARCH_RESULT_LIMIT);
+    const fragment = document.createDocumentFragment();
+
+    shown.forEach(row => {
+        const ticker = index.symbols[row];
+        const tr = document.createElement('tr');
+        if (index.charts.has(row)) {
+            tr.className = 'clickable-row';
+            tr.dataset.ticker = ticker;
+            tr.tabIndex = 0;
+            tr.setAttribute('role', 'button');
+            tr.setAttribute('aria-label', 'Open chart for ' + ticker);
+        }
+        const price = index.price[row];
+        const [daily, dailyClass] = formatPct(index.daily[row]);
+        const [weekly, weeklyClass] = formatPct(index.weekly[row]);
+        searchCell(tr, ticker, 'symbol');
+        searchCell(tr, index.names[row] || '', 'name-col');
+        searchCell(tr, price === null || price === undefined ? '—' : '$' + price.toFixed(2), 'price');
+        searchCell(tr, daily, 'change-pct ' + dailyClass);
+        searchCell(tr, weekly, 'change-pct ' + weeklyClass);
+        fragment.appendChild(tr);
+    });
+
+    tbody.replaceChildren(fragment);
+    table.classList.toggle('no-names', !index.names.length);
+    const more = rows.length > shown.length ? ` (showing ${shown.length})` : '';
+    document.getElementById('searchSummary').textContent =
+        `${rows.length} match${rows.length === 1 ? '' : 'es'} for "${query}"${more}`;
+}
+
+function runSearch() {
+    const query = document.getElementById('searchInput').value.trim();
+    const key = searchKey(query);
+    document.body.classList.toggle('searching', key.length > 0);
+    document.getElementById('searchResults').classList.toggle('hidden', key.length === 0);
+    if (!key) {
+        return;
+    }
+
+    loadSearchIndex()
+        .then(index => {
+            // Ignore results for a query the user has already changed
+            if (searchKey(document.getElementById('searchInput').value) === key) {
+                renderSearchResults(index, searchRows(index, key), query);
+            }
+        })
+        .catch(error => {
+            console.error('Search index error:', error);
+            document.getElementById('searchSummary').textContent = 'Search unavailable';
+        });
+}
+
+function scheduleSearch() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(runSearch, SEARCH_DEBOUNCE_MS);
+}
+
+function bindSearchResults() {
+    const tbody = document.querySelector('#searchResultsTable tbody');
+    const rowTicker = event => {
+        const row = event.target.closest('.clickable-row');
+        return row ? row.dataset.ticker : null;
+    };
+    tbody.addEventListener('click', event => {
+        const ticker = rowTicker(event);
+        if (ticker) {
+            openChart(ticker);
+        }
+    });
+    tbody.addEventListener('keydown', event => {
+        const ticker = rowTicker(event);
+        if (ticker && (event.key === 'Enter' || event.key === ' ')) {
+            event.preventDefault();
+            openChart(ticker);
+        }
+    });
+    // Fetch the index while the user starts typing
+    document.getElementById('searchInput').addEventListener('focus', () => {
+        loadSearchIndex().catch(() => {});
+    }, { once: true });
+}
+
+function loadDataset(view) {
+    if (!datasetCache[view]) {
+        datasetCache[view] = fetch(DATASET_URLS[view])
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Dataset not found');
+                }
+                return response.json();
+            })
+            .catch(error => {
+                delete datasetCache[view];
+                throw error;
+            });
+    }
+    return datasetCache[view];
+}
+
+function copyTableData(evt, view) {
+    const isWeekly = view === 'weekly';
+    const btn = evt.currentTarget;
+
+    // Built from the inlined movers, synchronously: Safari only allows
+    // clipboard writes inside the click handler itself
+    const gainers = MOVERS[view].gainers;
+    const losers = MOVERS[view].losers;
+    const updateText = isWeekly ? WEEKLY_UPDATE_TEXT : DAILY_UPDATE_TEXT;
+
+    let text = UNIVERSE_LABEL + ' Market Movers - ' + (isWeekly ? 'WEEKLY (MON-FRI)' : 'DAILY') + '\n';
+    text += updateText + '\n\n';
+
+    if (!isWeekly) {
+        text += 'TOP GAINERS\n';
+        text += 'Symbol\tPrice\tChange\tChange%\tVolume\n';
+        gainers.forEach(s => {
+            text += s.ticker + '\t$' + s.price + '\t' + (s.change >= 0 ? '+' : '') + '$' + s.change + '\t' + (s.change_pct >= 0 ? '+' : '') + s.change_pct + '%\t' + (s.volume || 0).toLocaleString() + '\n';
+        });
+
+        text += '\nTOP LOSERS\n';
+        text += 'Symbol\tPrice\tChange\tChange%\tVolume\n';
+        losers.forEach(s => {
+            text += s.ticker + '\t$' + s.price + '\t$' + s.change + '\t' + s.change_pct + '%\t' + (s.volume || 0).toLocaleString() + '\n';
+        });
+    } else {
+        text += 'TOP WEEKLY GAINERS\n';
+        text += 'Symbol\tWeekStart\tWeekEnd\tChange\tChange%\tAvgVol\n';
+        gainers.forEach(s => {
+            text += s.ticker + '\t$' + s.start_price + '\t$' + s.end_price + '\t' + (s.change >= 0 ? '+' : '') + '$' + s.change + '\t' + (s.change_pct >= 0 ? '+' : '') + s.change_pct + '%\t' + (s.avg_volume || 0).toLocaleString() + '\n';
+        });
+
+        text += '\nTOP WEEKLY LOSERS\n';
+        text += 'Symbol\tWeekStart\tWeekEnd\tChange\tChange%\tAvgVol\n';
+        losers.forEach(s => {
+            text += s.ticker + '\t$' + s.start_price + '\t$' + s.end_price + '\t$' + s.change + '\t' + s.change_pct + '%\t' + (s.avg_volume || 0).toLocaleString() + '\n';
+        });
+    }
+
+    navigator.clipboard.writeText(text).then(() => {
+        const originalText = btn.innerHTML;
+        btn.innerHTML = '<svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke="currentColor" style="width:20px;height:20px"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M5 13l4 4L19 7" /></svg> Copied!';
+        setTimeout(() => { btn.innerHTML = originalText; }, 2000);
+    }).catch(error => {
+        console.error('Copy failed', error);
+    });
+}
+
+// Default view: daily on weekdays, weekly on weekends (when available)
+document.addEventListener('DOMContentLoaded', () => {
+    switchView(DEFAULT_VIEW === 'weekly' ? 'weekly' : 'daily');
+    bindChartRows();
+    bindSearchResults();
+    // The browser may restore a previous query on reload
+    if (document.getElementById('searchInput').value) {
+        runSearch();
+    }
+});
+
+chartTabs.forEach(tab => {
+    tab.addEventListener('click', () => {
+        setActiveChartRange(tab.dataset.range);
+    });
+});
+
+chartClose.addEventListener('click', closeChart);
+
+chartModal.addEventListener('click', event => {
+    if (event.target === chartModal) {
+        closeChart();
+    }
+});
+
+document.addEventListener('keydown', event => {
+    if (event.key === 'Escape' && !chartModal.classList.contains('hidden')) {
+        closeChart();
+    }
+});
+
+window.addEventListener('resize', () => {
+    if (chartInstance) {
+        chartInstance.applyOptions({
+            width: chartContainer.clientWidth,
+            height: chartContainer.clientHeight,
+        });
+    }
+});
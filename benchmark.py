@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Market Movers - Pipeline Benchmarks
+Times and memory-profiles every generator stage on synthetic market data
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+import generate_site as site
+
+# Universe sizes (tickers) and daily history lengths (sessions) to sweep
+BENCH_TICKERS = [500, 3000, 10000]
+BENCH_SESSIONS = [260, 520]
+# Timed repetitions per stage (the best run is reported)
+BENCH_REPEATS = 3
+# Intraday history generated for the chart tickers (15m / 1h bars)
+BENCH_15M_BARS = 26 * 60
+BENCH_1H_BARS = 7 * 730
+# Slowdown ratio above which --compare reports a regression
+BENCH_REGRESSION_RATIO = 1.25
+# Last synthetic session: a Friday, so the weekly view covers a full week
+BENCH_END_DATE = "2026-01-09"
+
+
+def synthetic_market(n_tickers: int, n_bars: int, freq: str = "B", end: str = BENCH_END_DATE,
+                     seed: int = 0, missing: float = 0.01) -> pd.DataFrame:
+    """Random-walk OHLCV frame shaped like ``yf.download`` output: (Price, Ticker) columns."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(end=end, periods=n_bars, freq=freq, name="Date")
+    tickers = [f"T{i:05d}" for i in range(n_tickers)]
+
+    start = rng.uniform(5, 500, n_tickers)
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.02, (n_bars, n_tickers)), axis=0))
+    open_ = close * np.exp(rng.normal(0, 0.005, close.shape))
+    spread = np.abs(rng.normal(0, 0.01, close.shape))
+    fields = {
+        "Close": close,
+        "High": np.maximum(open_, close) * (1 + spread),
+        "Low": np.minimum(open_, close) * (1 - spread),
+        "Open": open_,
+        "Volume": rng.integers(10_000, 50_000_000, close.shape).astype(float),
+    }
+    # Scattered gaps (halts, late listings) like real downloads have
+    gaps = rng.random(close.shape) < missing
+    for values in fields.values():
+        values[gaps] = np.nan
+
+    frame = pd.concat({name: pd.DataFrame(values, index=index, columns=tickers) for name, values in fields.items()}, axis=1)
+    frame.columns = frame.columns.set_names(["Price", "Ticker"])
+    return frame
+
+
+def _measure(func, repeats: int) -> dict:
+    """Best wall time over ``repeats`` runs, then one traced run for peak memory."""
+    timings = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeats):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {"seconds": min(timings), "mean_seconds": sum(timings) / len(timings), "peak_bytes": peak}
+
+
+def bench_case(n_tickers: int, n_sessions: int, repeats: int, workdir: str) -> list[dict]:
+    """Time every pipeline stage for one universe size and history length."""
+    history = synthetic_market(n_tickers, n_sessions)
+    data = history.iloc[-site.DATASET_SESSIONS:]
+    week_start, week_end = site.get_week_date_range(pd.Timestamp(BENCH_END_DATE).to_pydatetime() + timedelta(days=1))
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        daily_all, daily_meta = site.build_daily_dataset(data)
+        weekly_all, weekly_meta = site.build_weekly_dataset(data, start_date=week_start, end_date=week_end)
+    daily = site.rank_stocks(daily_all)
+    weekly = site.rank_stocks(weekly_all)
+
+    # Charts are built for the top movers only, as in main()
+    chart_tickers = sorted({s["ticker"] for s in daily["gainers"] + daily["losers"] + weekly["gainers"] + weekly["losers"]})
+    data_15m = synthetic_market(len(chart_tickers), BENCH_15M_BARS, freq="15min", seed=1)
+    data_1h = synthetic_market(len(chart_tickers), BENCH_1H_BARS, freq="h", seed=2)
+    rename = dict(zip(data_15m.columns.get_level_values(1).unique(), chart_tickers))
+    data_15m = data_15m.rename(columns=rename, level=1)
+    data_1h = data_1h.rename(columns=rename, level=1)
+    payloads = site.build_chart_payloads(history, chart_tickers, data_15m=data_15m, data_1h=data_1h)
+    ohlc_frames = [site._build_ohlc_frame(history, ticker) for ticker in chart_tickers]
+
+    def resample():
+        for frame in ohlc_frames:
+            site._resample_ohlc(frame, "W-FRI")
+            site._resample_ohlc(frame, "M")
+
+    def write_csvs():
+        for view, ranking, columns, headers in (
+            ("daily", daily, site.DAILY_COLUMNS, site.DAILY_CSV_HEADERS),
+            ("weekly", weekly, site.WEEKLY_COLUMNS, site.WEEKLY_CSV_HEADERS),
+        ):
+            header, rows = site.csv_rows(ranking["all"], columns, headers)
+            site.write_csv_rows(header, rows[:len(ranking["gainers"])], os.path.join(workdir, f"{view}-gainers.csv"))
+            site.write_csv_rows(header, rows[len(rows) - len(ranking["losers"]):][::-1], os.path.join(workdir, f"{view}-losers.csv"))
+            site.write_csv_rows(header, rows, os.path.join(workdir, f"{view}-all.csv"))
+
+    def write_html():
+        with open(os.path.join(workdir, "index.html"), "w", encoding="utf-8") as f:
+            site.stream_html(
+                f,
+                daily["gainers"], daily["losers"], daily_all, daily_meta,
+                weekly["gainers"], weekly["losers"], weekly_all, weekly_meta,
+                datetime(2026, 1, 10, 12, tzinfo=timezone.utc),
+            )
+
+    stages = {
+        "build_daily_dataset": lambda: site.build_daily_dataset(data),
+        "build_weekly_dataset": lambda: site.build_weekly_dataset(data, start_date=week_start, end_date=week_end),
+        "build_returns_dataset": lambda: site.build_returns_dataset(history),
+        "rank_stocks": lambda: (site.rank_stocks(daily_all), site.rank_stocks(weekly_all)),
+        "build_chart_payloads": lambda: site.build_chart_payloads(history, chart_tickers, data_15m=data_15m, data_1h=data_1h),
+        "_resample_ohlc": resample,
+        "serialize_charts": lambda: [site._serialize_chart_payload(payload) for payload in payloads.values()],
+        "csv_writers": write_csvs,
+        "generate_html": write_html,
+    }
+
+    results = []
+    for stage, func in stages.items():
+        result = _measure(func, repeats)
+        result.update(stage=stage, tickers=n_tickers, sessions=n_sessions, chart_tickers=len(chart_tickers))
+        results.append(result)
+        print(
+            f"   {stage:<24} {n_tickers:>6} tickers x {n_sessions:>4} sessions: "
+            f"{result['seconds'] * 1000:9.1f} ms, peak {result['peak_bytes'] / 2**20:8.1f} MiB"
+        )
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(current: dict, baseline: dict, ratio: float = BENCH_REGRESSION_RATIO) -> list[str]:
+    """Stages slower than ``ratio`` x the baseline (matched on stage/tickers/sessions)."""
+    key = lambda r: (r["stage"], r["tickers"], r["sessions"])
+    before = {key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        old = before.get(key(result))
+        if not old or not old["seconds"]:
+            continue
+        change = result["seconds"] / old["seconds"]
+        marker = "  ⚠️ regression" if change > ratio else ""
+        print(f"   {result['stage']:<24} {result['tickers']:>6} x {result['sessions']:>4}: {change:5.2f}x{marker}")
+        if change > ratio:
+            regressions.append(f"{result['stage']} ({result['tickers']} x {result['sessions']}): {change:.2f}x")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the market movers pipeline on synthetic data.")
+    parser.add_argument("--tickers", type=int, nargs="+", default=BENCH_TICKERS)
+    parser.add_argument("--sessions", type=int, nargs="+", default=BENCH_SESSIONS)
+    parser.add_argument("--repeats", type=int, default=BENCH_REPEATS)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", help="previous results file; exit 1 on regressions")
+    parser.add_argument("--ratio", type=float, default=BENCH_REGRESSION_RATIO)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⏱️  Market Movers - Pipeline Benchmarks")
+    print("=" * 60)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_tickers in args.tickers:
+            for n_sessions in args.sessions:
+                print(f"\n📊 {n_tickers} tickers, {n_sessions} sessions")
+                results.extend(bench_case(n_tickers, n_sessions, args.repeats, workdir))
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "repeats": args.repeats,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\n📈 Compared with {args.compare} (commit {baseline.get('commit')})")
+        regressions = compare_results(report, baseline, args.ratio)
+        if regressions:
+            print(f"\n❌ {len(regressions)} stage(s) slower than {args.ratio}x baseline")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
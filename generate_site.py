@@ -4,14 +4,45 @@ S&P 500 Market Movers - Static Site Generator
 Generates a beautiful static website with daily market data
 """
 
+import io
+import html
 import os
+import sys
+import re
+import csv
 import json
+import gzip
+import hashlib
+import string
+import functools
+import contextlib
+import cProfile
+import pstats
+import tracemalloc
 import yfinance as yf
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta, timezone, date
 from zoneinfo import ZoneInfo
+import time
+import threading
 import warnings
 
+try:
+    import resource
+except ImportError:  # not available on Windows: peak RSS is reported as null
+    resource = None
+
+try:
+    import brotli
+except ImportError:  # optional: only needed for .br precompression
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON encoding, stdlib json otherwise
+    orjson = None
+
 # S&P 500 tickers (comprehensive list)
 SP500_TICKERS = [
     'A', 'AAPL', 'ABBV', 'ABNB', 'ABT', 'ACGL', 'ACN', 'ADBE', 'ADI', 'ADM',
@@ -78,89 +109,724 @@ CHART_1H_BARS = 195    # ~30 trading days of 1-hour bars
 CHART_2H_BARS = 98     # ~30 trading days of 2-hour bars
 CHART_3H_BARS = 65     # ~30 trading days of 3-hour bars
 
+# Chart JSON layout: "rows" (one {time, open, high, low, close} object per bar)
+# or "columnar" (parallel t/o/h/l/c arrays per range, prices rounded)
+CHART_FORMAT = os.environ.get("MARKET_MOVERS_CHART_FORMAT", "rows")
+CHART_PRICE_DECIMALS = int(os.environ.get("MARKET_MOVERS_CHART_DECIMALS", "2"))
+CHART_RANGES = ("day", "week", "month", "m15", "h1", "h2", "h3")
+# Pack every chart payload into one newline-delimited bundle plus a byte-range
+# index instead of one file per ticker; the page fetches tickers via HTTP Range
+CHART_BUNDLE = os.environ.get("MARKET_MOVERS_CHART_BUNDLE", "0") == "1"
+CHART_BUNDLE_FILE = "bundle.ndjson"
+CHART_BUNDLE_INDEX_FILE = "index.json"
+
+# Sessions of daily history the daily/weekly datasets are built from
+DATASET_SESSIONS = 10
+# Symbol/name search index over the whole universe, fetched by the page on the
+# first search (referenced with a ?v=<content hash>); the same normalization
+# (A-Z0-9 only) is applied in app.js
+SEARCH_INDEX_FILE = "search.json"
+# Lookback of the universe download: covers every RETURN_WINDOWS base close
+# (52W) and, with CHART_FROM_UNIVERSE, the chart history
+HISTORY_PERIOD = "2y"
+
+# Multi-window returns: an int is a number of sessions, an offset a calendar
+# lookback, "ytd" the last close of the previous year
+RETURN_WINDOWS = {
+    "1d": 1,
+    "5d": 5,
+    "1m": pd.DateOffset(months=1),
+    "3m": pd.DateOffset(months=3),
+    "ytd": "ytd",
+    "52w": pd.DateOffset(weeks=52),
+}
+
+# Incremental builds: skip regenerating/writing artifacts whose inputs (and the
+# generator source) match the manifest from the previous run
+INCREMENTAL_BUILD = os.environ.get("MARKET_MOVERS_INCREMENTAL", "0") == "1"
+BUILD_MANIFEST_FILE = ".build-manifest.json"
+
+# Per-stage timings, counters and artifact sizes of every build, written to
+# dist/build-metrics.json; events are also appended as JSON lines to
+# MARKET_MOVERS_METRICS_LOG when set ("-" for stdout)
+BUILD_METRICS_FILE = "build-metrics.json"
+METRICS_LOG = os.environ.get("MARKET_MOVERS_METRICS_LOG", "")
+
+# Opt-in profiling of build stages: a comma-separated list of stage names
+# (see build-metrics.json) or "all". Each profiled stage dumps
+# <stage>.pstats (cProfile) and/or <stage>.alloc.txt (tracemalloc top
+# allocations) into PROFILE_DIR and prints its hotspots. Tracemalloc slows
+# the stage down a lot (and skews cProfile timings), so it is opt-in:
+# MARKET_MOVERS_PROFILE_MODE=tracemalloc or =cprofile,tracemalloc. Threads
+# started by a stage are profiled too (see build_stage).
+PROFILE_STAGES = {
+    stage.strip() for stage in os.environ.get("MARKET_MOVERS_PROFILE", "").split(",") if stage.strip()
+}
+PROFILE_MODES = {
+    mode.strip() for mode in os.environ.get("MARKET_MOVERS_PROFILE_MODE", "cprofile").split(",")
+}
+PROFILE_DIR = os.environ.get("MARKET_MOVERS_PROFILE_DIR", "dist/profiles")
+PROFILE_TOP = int(os.environ.get("MARKET_MOVERS_PROFILE_TOP", "15"))
+PROFILE_TRACE_FRAMES = 5
+
+# Page skeleton (string.Template) and static CSS/JS; assets are published
+# under content-fingerprinted names so browsers can cache them indefinitely
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+STATIC_ASSETS = ("style.css", "app.js")
+
+# The daily/15m/1h chart downloads run concurrently; stages still running
+# after this many seconds are dropped (their chart ranges stay empty)
+CHART_FETCH_DEADLINE_SECONDS = float(os.environ.get("MARKET_MOVERS_CHART_DEADLINE", "180"))
+
+# Typed Parquet exports of the daily/weekly all-stock tables and the chart OHLC
+# history (data/*/all_stocks.parquet, data/charts/ohlc.parquet) for analytics
+PARQUET_EXPORT = os.environ.get("MARKET_MOVERS_PARQUET", "0") == "1"
+DAILY_COLUMNS = {
+    "ticker": "string",
+    "price": "float64",
+    "prev_close": "float64",
+    "change": "float64",
+    "change_pct": "float64",
+    "volume": "int64",
+}
+WEEKLY_COLUMNS = {
+    "ticker": "string",
+    "start_price": "float64",
+    "end_price": "float64",
+    "change": "float64",
+    "change_pct": "float64",
+    "avg_volume": "int64",
+    "days": "int64",
+}
+
+# Compact JSON: minified separators for data.json and chart payloads, with
+# row-format chart prices rounded to CHART_PRICE_DECIMALS
+COMPACT_JSON = os.environ.get("MARKET_MOVERS_COMPACT_JSON", "0") == "1"
+
+# Post-build: write .gz (and .br, if the brotli package is installed) next to
+# every text artifact so a static server/CDN can serve them as-is
+PRECOMPRESS = os.environ.get("MARKET_MOVERS_PRECOMPRESS", "0") == "1"
+PRECOMPRESS_EXTENSIONS = (".html", ".json", ".ndjson", ".csv", ".css", ".js")
+
+# JSON encoder for generated data files: "orjson" (if installed) or "json";
+# both produce the same values, orjson never emits optional whitespace
+JSON_BACKEND = os.environ.get("MARKET_MOVERS_JSON_BACKEND", "orjson" if orjson is not None else "json")
+
+
+
+# Universe registry: "<name>.csv" / "<name>.json" files in UNIVERSE_DIR, each
+# listing symbol (+ optional name, sector). "sp500" falls back to the list above.
+UNIVERSE_DIR = os.environ.get("MARKET_MOVERS_UNIVERSE_DIR", "universes")
+UNIVERSE = os.environ.get("MARKET_MOVERS_UNIVERSE", "sp500")
+BUILTIN_UNIVERSES = {
+    "sp500": {"label": "S&P 500", "tickers": SP500_TICKERS},
+}
+# Tickers per yfinance request; larger universes are split into batches that
+# run on a bounded worker pool, each retried with exponential backoff
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get("MARKET_MOVERS_CHUNK_SIZE", "100"))
+DOWNLOAD_WORKERS = int(os.environ.get("MARKET_MOVERS_DOWNLOAD_WORKERS", "4"))
+DOWNLOAD_ATTEMPTS = int(os.environ.get("MARKET_MOVERS_DOWNLOAD_ATTEMPTS", "3"))
+DOWNLOAD_BACKOFF_SECONDS = float(os.environ.get("MARKET_MOVERS_DOWNLOAD_BACKOFF", "1.0"))
+# Per-HTTP-request timeout passed to yfinance, so a hung request can't stall the build
+DOWNLOAD_TIMEOUT_SECONDS = float(os.environ.get("MARKET_MOVERS_DOWNLOAD_TIMEOUT", "30"))
+# Record/replay of yfinance responses for offline, repeatable builds: "record"
+# saves every download (keyed by its arguments) plus the build clock under
+# YF_FIXTURE_DIR, "replay" serves them back without touching the network
+YF_FIXTURE_MODE = os.environ.get("MARKET_MOVERS_YF_MODE", "")
+YF_FIXTURE_DIR = os.environ.get("MARKET_MOVERS_YF_FIXTURES", os.path.join("fixtures", "yfinance"))
+YF_FIXTURE_CLOCK_FILE = "clock.json"
+
+
+# Yahoo symbols (e.g. BRK-B, ^GSPC, EURUSD=X). Symbols end up in HTML, file
+# names and requests, so anything else is rejected when the universe is loaded.
+UNIVERSE_SYMBOL_RE = re.compile(r"[A-Z0-9^][A-Z0-9.\-=^]*")
+
+
+def list_universes(universe_dir: str = UNIVERSE_DIR) -> list[str]:
+    """Names of every universe that can be selected."""
+    names = set(BUILTIN_UNIVERSES)
+    if os.path.isdir(universe_dir):
+        for filename in os.listdir(universe_dir):
+            stem, ext = os.path.splitext(filename)
+            if ext in (".csv", ".json"):
+                names.add(stem)
+    return sorted(names)
+
+
+def _read_universe_members(path: str) -> tuple[list[dict], str | None]:
+    if path.endswith(".json"):
+        with open(path) as f:
+            raw = json.load(f)
+        if isinstance(raw, dict):
+            return raw.get("members", []), raw.get("label")
+        return raw, None
+
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    # Header names are case-insensitive ("Symbol" or "symbol")
+    return [{(key or "").strip().lower(): value for key, value in row.items()} for row in rows], None
+
+
+def load_universe(name: str = UNIVERSE, universe_dir: str = UNIVERSE_DIR) -> dict:
+    """Load a universe definition by name.
+
+    Returns ``{"name", "label", "tickers", "members"}`` where ``members`` holds
+    one ``{"symbol", "name", "sector"}`` dict per ticker.
+    """
+    for ext in (".csv", ".json"):
+        path = os.path.join(universe_dir, f"{name}{ext}")
+        if os.path.exists(path):
+            raw_members, label = _read_universe_members(path)
+            break
+    else:
+        if name not in BUILTIN_UNIVERSES:
+            raise ValueError(f"Unknown universe '{name}' (available: {', '.join(list_universes(universe_dir))})")
+        builtin = BUILTIN_UNIVERSES[name]
+        raw_members, label = [{"symbol": ticker} for ticker in builtin["tickers"]], builtin["label"]
+
+    members = []
+    seen = set()
+    for raw in raw_members:
+        symbol = (raw.get("symbol") or "").strip().upper()
+        if not symbol or symbol in seen:
+            continue
+        if not UNIVERSE_SYMBOL_RE.fullmatch(symbol):
+            raise ValueError(f"Universe '{name}' has an invalid symbol: {symbol!r}")
+        seen.add(symbol)
+        members.append(
+            {
+                "symbol": symbol,
+                "name": (raw.get("name") or "").strip(),
+                "sector": (raw.get("sector") or "").strip(),
+            }
+        )
 
+    if not members:
+        raise ValueError(f"Universe '{name}' has no symbols")
 
-def download_sp500_history(period: str = "10d"):
-    """Download recent history for all S&P 500 stocks using yfinance.
+    return {
+        "name": name,
+        "label": label or name.replace("-", " ").replace("_", " ").title(),
+        "tickers": [member["symbol"] for member in members],
+        "members": members,
+    }
 
-    We download once and derive both daily + weekly datasets from the same data.
+
+# Local OHLCV bar store (one Parquet file per interval, long format keyed by
+# ticker + timestamp). Set MARKET_MOVERS_BAR_STORE="" to always hit Yahoo.
+# (off by default when recording/replaying, so the calls don't depend on cache state)
+BAR_STORE_DIR = os.environ.get("MARKET_MOVERS_BAR_STORE", "" if YF_FIXTURE_MODE else os.path.join(".cache", "bars"))
+BAR_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+# Relative tolerance when re-checking the last stored bar; a larger drift means
+# Yahoo re-adjusted the history (split/dividend) and the ticker is refetched.
+BAR_STORE_RTOL = 1e-4
+# How far after the window start the first stored bar may be (weekends/holidays)
+BAR_STORE_SLACK = pd.Timedelta(days=5)
+# Slice chart tickers' daily history out of the universe download (which
+# already covers HISTORY_PERIOD) instead of a separate chart download. Not
+# tied to the bar store, so record/replay builds make the same calls as production.
+CHART_FROM_UNIVERSE = os.environ.get("MARKET_MOVERS_CHART_FROM_UNIVERSE", "1") == "1"
+
+
+# yfinance (and the pandas calls it makes) warns about deprecations on every
+# request. Filtered once here: ``warnings.catch_warnings`` is process-wide and
+# not safe around the concurrent downloads.
+warnings.filterwarnings("ignore", module=r"yfinance(\.|$)")
+
+
+def _yf_download(tickers, **kwargs):
+    """One live yfinance request for ``tickers``."""
+    return yf.download(
+        " ".join(tickers),
+        progress=False,
+        threads=True,
+        auto_adjust=True,
+        ignore_tz=True,
+        timeout=DOWNLOAD_TIMEOUT_SECONDS,
+        **kwargs,
+    )
+
+
+def _fixture_path(tickers, kwargs, fixture_dir: str) -> str:
+    call = json.dumps({"tickers": list(tickers), **kwargs}, sort_keys=True, default=str)
+    return os.path.join(fixture_dir, hashlib.sha1(call.encode("utf-8")).hexdigest()[:20] + ".pkl")
+
+
+def _yf_fetch(tickers, **kwargs):
+    """Default downloader: yfinance, recorded to or replayed from fixtures (YF_FIXTURE_MODE)."""
+    if YF_FIXTURE_MODE not in ("", "record", "replay"):
+        raise ValueError(f"Unknown MARKET_MOVERS_YF_MODE: {YF_FIXTURE_MODE}")
+
+    path = _fixture_path(tickers, kwargs, YF_FIXTURE_DIR)
+    if YF_FIXTURE_MODE == "replay":
+        if not os.path.exists(path):
+            raise LookupError(f"No recorded response for {len(tickers)} tickers {kwargs} ({path})")
+        return pd.read_pickle(path)
+
+    frame = _yf_download(tickers, **kwargs)
+    if YF_FIXTURE_MODE == "record":
+        os.makedirs(YF_FIXTURE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{id(frame)}.tmp"
+        pd.to_pickle(frame, tmp_path)
+        os.replace(tmp_path, path)
+    return frame
+
+
+@functools.lru_cache(maxsize=None)
+def build_clock() -> datetime:
+    """The build's "now" (UTC), fixed for the run; recorded/replayed with fixtures."""
+    path = os.path.join(YF_FIXTURE_DIR, YF_FIXTURE_CLOCK_FILE)
+    if YF_FIXTURE_MODE == "replay":
+        with open(path) as f:
+            return datetime.fromisoformat(json.load(f)["now"])
+
+    now = datetime.now(timezone.utc)
+    if YF_FIXTURE_MODE == "record":
+        os.makedirs(YF_FIXTURE_DIR, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"now": now.isoformat()}, f)
+    return now
+
+
+def _local_today() -> pd.Timestamp:
+    """Midnight of the build day in local time (naive), as pd.Timestamp.now() would give."""
+    return pd.Timestamp(build_clock().astimezone()).tz_localize(None).normalize()
+
+
+def _chunked(items, size: int):
+    for i in range(0, len(items), max(size, 1)):
+        yield items[i:i + size]
+
+
+def _as_multiindex(frame, tickers):
+    """Ensure a downloaded frame uses (field, ticker) columns."""
+    if frame is None or frame.empty or isinstance(frame.columns, pd.MultiIndex):
+        return frame
+    # Older yfinance returns flat columns for single-ticker downloads
+    return pd.concat({tickers[0]: frame}, axis=1).swaplevel(0, 1, axis=1)
+
+
+def _tickers_with_data(frame, tickers) -> set:
+    """Tickers that came back with at least one close."""
+    if frame is None or frame.empty:
+        return set()
+    try:
+        closes = frame["Close"]
+    except KeyError:
+        return set()
+    return set(closes.columns[closes.notna().any()]) & set(tickers)
+
+
+def _fetch_chunk(downloader, chunk, cancel=None, **kwargs):
+    """Fetch one chunk, retrying tickers that errored or came back empty.
+
+    Returns the merged frame (or None) and a stats dict for the chunk, where
+    ``seconds`` is time spent in ``downloader`` calls only (backoff waits are
+    reported separately). No further attempts are made once ``cancel`` is set.
+    """
+    frames = []
+    pending = list(chunk)
+    attempts = 0
+    request_seconds = 0.0
+    backoff_seconds = 0.0
+    while pending and attempts < DOWNLOAD_ATTEMPTS and not (cancel and cancel.is_set()):
+        if attempts:
+            backoff = DOWNLOAD_BACKOFF_SECONDS * 2 ** (attempts - 1)
+            time.sleep(backoff)
+            backoff_seconds += backoff
+        attempts += 1
+        started = time.perf_counter()
+        try:
+            try:
+                raw = downloader(pending, **kwargs)
+            finally:
+                request_seconds += time.perf_counter() - started
+            frame = _as_multiindex(raw, pending)
+        except Exception as exc:
+            print(f"   ⚠️  Download of {len(pending)} tickers failed (attempt {attempts}): {exc}")
+            continue
+
+        received = _tickers_with_data(frame, pending)
+        if received:
+            frames.append(frame.loc[:, frame.columns.get_level_values(1).isin(received)])
+            pending = [ticker for ticker in pending if ticker not in received]
+
+    stats = {
+        "tickers": len(chunk),
+        "attempts": attempts,
+        "missing": pending,
+        "seconds": request_seconds,
+        "backoff_seconds": backoff_seconds,
+    }
+    return (pd.concat(frames, axis=1) if frames else None), stats
+
+
+def _map_on_daemon_threads(fn, items, workers: int) -> list:
+    """``[fn(item) for item in items]`` on ``workers`` daemon threads.
+
+    Used instead of ThreadPoolExecutor, whose threads are joined at interpreter
+    exit: a download abandoned past the chart deadline must not keep the
+    process alive. The first exception raised by ``fn`` is re-raised.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    errors = []
+    queue = iter(enumerate(items))
+    queue_lock = threading.Lock()
+
+    def work():
+        while not errors:
+            with queue_lock:
+                job = next(queue, None)
+            if job is None:
+                return
+            index, item = job
+            try:
+                results[index] = fn(item)
+            except Exception as exc:
+                errors.append(exc)
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+# Summary of every chunked download in this process (read by the build metrics)
+DOWNLOAD_LOG = []
+
+
+def _download_chunked(downloader, tickers, cancel=None, **kwargs):
+    """Run ``downloader`` over DOWNLOAD_CHUNK_SIZE batches on a bounded pool.
+
+    Chunk results are merged back into one (field, ticker) frame. A download
+    abandoned through ``cancel`` stops retrying and is not logged.
+    """
+    tickers = list(tickers)
+    if not tickers:
+        return pd.DataFrame()
+
+    chunks = list(_chunked(tickers, DOWNLOAD_CHUNK_SIZE))
+    workers = max(1, min(DOWNLOAD_WORKERS, len(chunks)))
+    results = _map_on_daemon_threads(
+        lambda chunk: _fetch_chunk(downloader, chunk, cancel=cancel, **kwargs), chunks, workers
+    )
+    if cancel is not None and cancel.is_set():
+        return pd.DataFrame()
+
+    frames = [frame for frame, _ in results if frame is not None]
+    timings = sorted(stats["seconds"] for _, stats in results)
+    retries = sum(stats["attempts"] - 1 for _, stats in results)
+    missing = [ticker for _, stats in results for ticker in stats["missing"]]
+    DOWNLOAD_LOG.append(
+        {
+            "interval": kwargs.get("interval", "1d"),
+            "tickers": len(tickers),
+            "chunks": len(chunks),
+            "retries": retries,
+            "missing": len(missing),
+            "slowest_chunk_seconds": round(timings[-1], 3),
+            "per_chunk": [
+                {
+                    "tickers": stats["tickers"],
+                    "attempts": stats["attempts"],
+                    "missing": len(stats["missing"]),
+                    "seconds": round(stats["seconds"], 3),
+                    "backoff_seconds": round(stats["backoff_seconds"], 3),
+                }
+                for _, stats in results
+            ],
+        }
+    )
+    print(
+        f"   Fetched {len(chunks)} chunk(s) on {workers} worker(s): "
+        f"median {timings[len(timings) // 2]:.1f}s, slowest {timings[-1]:.1f}s, "
+        f"{retries} retries, {len(missing)} tickers without data"
+    )
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).sort_index(axis=1)
+
+
+def _period_offset(period: str):
+    """Translate a yfinance period string (e.g. "10d", "1mo", "1y") to an offset."""
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        return None
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return pd.offsets.BDay(count)
+    if unit == "wk":
+        return pd.DateOffset(weeks=count)
+    if unit == "mo":
+        return pd.DateOffset(months=count)
+    return pd.DateOffset(years=count)
+
+
+def _empty_bars() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "ticker": pd.Series(dtype="object"),
+            "timestamp": pd.Series(dtype="datetime64[ns]"),
+            **{field: pd.Series(dtype="float64") for field in BAR_FIELDS},
+        }
+    )
+
+
+def _wide_to_long(frame, tickers) -> pd.DataFrame:
+    """Convert a yfinance-shaped (field, ticker) frame into long bar rows."""
+    if frame is None or frame.empty:
+        return _empty_bars()
+
+    data = _as_multiindex(frame, tickers)
+    fields = [field for field in BAR_FIELDS if field in data.columns.get_level_values(0)]
+    data = data[fields]
+    data.columns = data.columns.set_names(["field", "ticker"])
+    long = data.melt(ignore_index=False, value_name="value")
+    long.index.name = "timestamp"
+    bars = long.reset_index().pivot(index=["ticker", "timestamp"], columns="field", values="value")
+    bars.columns.name = None
+    bars = bars.reset_index()
+    for field in BAR_FIELDS:
+        if field not in bars.columns:
+            bars[field] = float("nan")
+
+    bars = bars.dropna(subset=["Close"])
+    return bars[["ticker", "timestamp", *BAR_FIELDS]]
+
+
+def _long_to_wide(bars: pd.DataFrame) -> pd.DataFrame:
+    """Convert long bar rows back to the yfinance (field, ticker) layout."""
+    if bars.empty:
+        return pd.DataFrame()
+
+    wide = bars.pivot(index="timestamp", columns="ticker", values=BAR_FIELDS)
+    wide.columns = wide.columns.set_names(["Price", "Ticker"])
+    wide.index.name = "Date"
+    return wide.sort_index()
+
+
+def _bar_store_path(store_dir: str, interval: str) -> str:
+    return os.path.join(store_dir, f"{interval}.parquet")
+
+
+def load_bar_store(store_dir: str, interval: str) -> pd.DataFrame:
+    """Load every stored bar for ``interval`` (empty frame if none yet)."""
+    path = _bar_store_path(store_dir, interval)
+    if not os.path.exists(path):
+        return _empty_bars()
+    return pd.read_parquet(path)
+
+
+def save_bar_store(bars: pd.DataFrame, store_dir: str, interval: str):
+    """Persist bars for ``interval``; later rows win on (ticker, timestamp)."""
+    os.makedirs(store_dir, exist_ok=True)
+    bars = bars.drop_duplicates(subset=["ticker", "timestamp"], keep="last")
+    bars = bars.sort_values(["ticker", "timestamp"]).reset_index(drop=True)
+
+    path = _bar_store_path(store_dir, interval)
+    tmp_path = f"{path}.tmp"
+    bars.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _readjusted_tickers(stored: pd.DataFrame, fresh: pd.DataFrame) -> set:
+    """Tickers whose refetched overlap bar no longer matches the stored close."""
+    overlap = fresh.merge(stored, on=["ticker", "timestamp"], suffixes=("", "_stored"))
+    if overlap.empty:
+        return set()
+
+    drift = (overlap["Close"] - overlap["Close_stored"]).abs()
+    mismatched = drift > BAR_STORE_RTOL * overlap["Close_stored"].abs()
+    return set(overlap.loc[mismatched, "ticker"])
+
+
+def _trim_to_period(bars: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Keep only the bars a plain ``period=`` download would have returned."""
+    if bars.empty:
+        return bars
+
+    if period.endswith("d"):
+        # "Nd" means N trading sessions, not calendar days
+        sessions = bars["timestamp"].dt.normalize().drop_duplicates().sort_values()
+        cutoff = sessions.iloc[-int(period[:-1]):].iloc[0]
+    else:
+        cutoff = _local_today() - _period_offset(period)
+    return bars[bars["timestamp"] >= cutoff]
+
+
+def download_history(tickers, period: str, interval: str = "1d", store_dir: str = BAR_STORE_DIR, downloader=None,
+                     cancel=None):
+    """Download OHLCV bars, consulting the local bar store first.
+
+    Tickers already in the store are only fetched from the day of their last
+    stored bar onwards (that bar is re-read so partial or re-adjusted bars are
+    caught); everything else falls back to a full ``period`` download.
+    ``downloader`` defaults to yfinance and is called as
+    ``downloader(tickers, period=... | start=..., interval=...)``. Once the
+    ``cancel`` event is set the download is abandoned and the store is left alone.
     """
-    print(f"Downloading {period} of data for {len(SP500_TICKERS)} S&P 500 stocks...")
-    tickers_str = " ".join(SP500_TICKERS)
-
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        return yf.download(
-            tickers_str,
-            period=period,
-            progress=False,
-            threads=True,
-            auto_adjust=True,
-            ignore_tz=True,
+    downloader = downloader or _yf_fetch
+    if not store_dir or _period_offset(period) is None:
+        return _download_chunked(downloader, tickers, cancel=cancel, period=period, interval=interval)
+
+    stored = load_bar_store(store_dir, interval)
+    first_bars = stored.groupby("ticker")["timestamp"].min()
+    last_bars = stored.groupby("ticker")["timestamp"].max()
+    window_start = _local_today() - _period_offset(period)
+
+    full_tickers = []
+    by_start = {}
+    for ticker in tickers:
+        last_bar = last_bars.get(ticker)
+        if (
+            last_bar is None
+            or last_bar < window_start
+            # Stored history is too short (e.g. 10d cached, 1y requested)
+            or first_bars[ticker] > window_start + BAR_STORE_SLACK
+        ):
+            full_tickers.append(ticker)
+        else:
+            by_start.setdefault(last_bar.normalize(), []).append(ticker)
+
+    fetched = []
+    for start, group in sorted(by_start.items()):
+        fresh = _wide_to_long(
+            _download_chunked(downloader, group, cancel=cancel, start=start.strftime("%Y-%m-%d"), interval=interval),
+            group,
+        )
+        readjusted = _readjusted_tickers(stored, fresh)
+        full_tickers.extend(sorted(readjusted))
+        fetched.append(fresh[~fresh["ticker"].isin(readjusted)])
+
+    if full_tickers:
+        fresh = _wide_to_long(
+            _download_chunked(downloader, full_tickers, cancel=cancel, period=period, interval=interval),
+            full_tickers,
         )
+        # Full downloads replace whatever history was stored for those tickers
+        stored = stored[~stored["ticker"].isin(set(fresh["ticker"]))]
+        fetched.append(fresh)
+
+    print(
+        f"   Bar store ({interval}): {len(tickers) - len(full_tickers)} incremental, "
+        f"{len(full_tickers)} full downloads"
+    )
+
+    if cancel is not None and cancel.is_set():
+        return pd.DataFrame()
+    bars = pd.concat([stored, *fetched], ignore_index=True) if fetched else stored
+    save_bar_store(bars, store_dir, interval)
+
+    bars = bars.drop_duplicates(subset=["ticker", "timestamp"], keep="last")
+    bars = bars[bars["ticker"].isin(set(tickers))]
+    return _long_to_wide(_trim_to_period(bars, period))
+
 
+def download_sp500_history(period: str = "10d", tickers=None):
+    """Download recent history for every universe ticker (S&P 500 by default).
 
-def download_chart_history(tickers, period: str = CHART_PERIOD):
+    We download once and derive both daily + weekly datasets from the same data.
+    """
+    tickers = list(tickers) if tickers is not None else SP500_TICKERS
+    print(f"Downloading {period} of data for {len(tickers)} stocks...")
+    return download_history(tickers, period=period, interval="1d")
+
+
+def download_chart_history(tickers, period: str = CHART_PERIOD, cancel=None):
     """Download OHLC history for charting the selected tickers."""
     if not tickers:
         return None
 
     print(f"Downloading {period} of chart data for {len(tickers)} tickers...")
-    tickers_str = " ".join(tickers)
-
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        return yf.download(
-            tickers_str,
-            period=period,
-            interval="1d",
-            progress=False,
-            threads=True,
-            auto_adjust=True,
-            ignore_tz=True,
-        )
+    return download_history(tickers, period=period, interval="1d", cancel=cancel)
 
 
-def download_intraday_15m(tickers):
+def download_intraday_15m(tickers, cancel=None):
     """Download 15-minute intraday data (last 60 days max from Yahoo)."""
     if not tickers:
         return None
 
     print(f"Downloading 15-min intraday data for {len(tickers)} tickers...")
-    tickers_str = " ".join(tickers)
-
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        return yf.download(
-            tickers_str,
-            period="5d",  # ~5 trading days of 15-min data
-            interval="15m",
-            progress=False,
-            threads=True,
-            auto_adjust=True,
-            ignore_tz=True,
-        )
+    # ~5 trading days of 15-min data
+    return download_history(tickers, period="5d", interval="15m", cancel=cancel)
 
 
-def download_intraday_1h(tickers):
+def download_intraday_1h(tickers, cancel=None):
     """Download 1-hour intraday data (last 730 days max from Yahoo)."""
     if not tickers:
         return None
 
     print(f"Downloading 1-hour intraday data for {len(tickers)} tickers...")
-    tickers_str = " ".join(tickers)
-
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        return yf.download(
-            tickers_str,
-            period="1mo",  # ~30 trading days of hourly data
-            interval="1h",
-            progress=False,
-            threads=True,
-            auto_adjust=True,
-            ignore_tz=True,
-        )
+    # ~30 trading days of hourly data
+    return download_history(tickers, period="1mo", interval="1h", cancel=cancel)
+
+
+def _timed_call(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def download_chart_data(tickers, deadline: float = CHART_FETCH_DEADLINE_SECONDS, daily=None) -> dict:
+    """Download daily, 15m and 1h chart history for ``tickers`` concurrently.
+
+    Returns ``{"day", "m15", "h1"}`` frames. A stage that fails or misses the
+    overall deadline comes back as None so the build can carry on without it.
+    Passing ``daily`` (already-downloaded daily bars) skips the daily stage.
+    """
+    # Daemon threads, not a pool: a stuck stage must not keep the process
+    # alive at exit. Past the deadline, ``cancel`` stops its retries, logging
+    # and bar store writes.
+    cancel = threading.Event()
+    stages = {
+        "m15": lambda: download_intraday_15m(tickers, cancel=cancel),
+        "h1": lambda: download_intraday_1h(tickers, cancel=cancel),
+    }
+    if daily is None:
+        stages["day"] = lambda: download_chart_history(tickers, period=CHART_PERIOD, cancel=cancel)
+
+    outcomes = {}
+
+    def run_stage(name, fn):
+        try:
+            outcomes[name] = (_timed_call(fn), None)
+        except Exception as exc:
+            outcomes[name] = (None, exc)
+
+    threads = [
+        threading.Thread(target=run_stage, args=(name, fn), name=f"chart-{name}", daemon=True)
+        for name, fn in stages.items()
+    ]
+    for thread in threads:
+        thread.start()
+    deadline_at = time.monotonic() + deadline
+    for thread in threads:
+        thread.join(max(0.0, deadline_at - time.monotonic()))
+    cancel.set()
+
+    results = {}
+    for name in stages:
+        outcome = outcomes.get(name)
+        if outcome is None:
+            print(f"   ⚠️  {name} chart download missed the {deadline:.0f}s deadline; skipping it")
+            results[name] = None
+        elif outcome[1] is not None:
+            print(f"   ⚠️  {name} chart download failed: {outcome[1]}")
+            results[name] = None
+        else:
+            results[name], seconds = outcome[0]
+            print(f"   {name} chart download took {seconds:.1f}s")
+
+    if daily is not None:
+        results["day"] = daily
+    return results
 
 
 def _series_for_field(data, field: str, ticker: str):
@@ -220,29 +886,25 @@ def _format_candles(frame: pd.DataFrame, max_bars: int, use_datetime: bool = Fal
         return []
 
     frame = frame.tail(max_bars)
-    candles = []
-    for idx, row in frame.iterrows():
-        if use_datetime:
-            # For intraday data, use the full datetime
-            if hasattr(idx, 'timestamp'):
-                candle_time = int(idx.timestamp())
-            else:
-                candle_time = int(datetime.combine(idx.date(), datetime.min.time(), tzinfo=timezone.utc).timestamp())
-        else:
-            # For daily/weekly/monthly, use date at midnight UTC
-            candle_time = datetime.combine(idx.date(), datetime.min.time(), tzinfo=timezone.utc)
-            candle_time = int(candle_time.timestamp())
-        
-        candles.append(
-            {
-                "time": candle_time,
-                "open": float(row["open"]),
-                "high": float(row["high"]),
-                "low": float(row["low"]),
-                "close": float(row["close"]),
-            }
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        # Intraday keeps the real instant; daily keeps the local trading date
+        index = index.tz_convert("UTC").tz_localize(None) if use_datetime else index.tz_localize(None)
+    if not use_datetime:
+        # For daily/weekly/monthly, use date at midnight UTC
+        index = index.normalize()
+    times = ((index - pd.Timestamp(0)) // pd.Timedelta(seconds=1)).tolist()
+
+    return [
+        {"time": candle_time, "open": open_, "high": high, "low": low, "close": close}
+        for candle_time, open_, high, low, close in zip(
+            times,
+            frame["open"].to_numpy(dtype=float).tolist(),
+            frame["high"].to_numpy(dtype=float).tolist(),
+            frame["low"].to_numpy(dtype=float).tolist(),
+            frame["close"].to_numpy(dtype=float).tolist(),
         )
-    return candles
+    ]
 
 
 def _format_intraday_candles(frame: pd.DataFrame, max_bars: int) -> list[dict]:
@@ -306,49 +968,263 @@ def build_chart_payloads(data, tickers, data_15m=None, data_1h=None) -> dict:
     return payloads
 
 
-def write_chart_payloads(payloads: dict, output_dir: str):
+def _columnar_candles(candles: list[dict], decimals: int = CHART_PRICE_DECIMALS) -> dict:
+    """Convert candle objects into parallel ``t/o/h/l/c`` arrays."""
+    return {
+        "t": [candle["time"] for candle in candles],
+        "o": [round(candle["open"], decimals) for candle in candles],
+        "h": [round(candle["high"], decimals) for candle in candles],
+        "l": [round(candle["low"], decimals) for candle in candles],
+        "c": [round(candle["close"], decimals) for candle in candles],
+    }
+
+
+def columnar_chart_payload(payload: dict, decimals: int = CHART_PRICE_DECIMALS) -> dict:
+    """Columnar version of a chart payload (see CHART_FORMAT)."""
+    columnar = {"ticker": payload["ticker"], "format": "columnar"}
+    for chart_range in CHART_RANGES:
+        columnar[chart_range] = _columnar_candles(payload.get(chart_range, []), decimals)
+    return columnar
+
+
+def _json_default(obj):
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(obj, indent: bool = False, compact: bool = True, backend: str = None) -> bytes:
+    """Encode ``obj`` as UTF-8 JSON bytes with the configured backend.
+
+    NumPy scalars and arrays are accepted directly. ``indent`` gives 2-space
+    indentation; ``compact=False`` keeps stdlib's default ``", "``/``": "``
+    separators (orjson output is always compact).
+    """
+    backend = backend or JSON_BACKEND
+    if backend == "orjson":
+        if orjson is None:
+            raise ValueError("JSON backend 'orjson' requested but orjson is not installed")
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=_json_default, option=option)
+    if backend != "json":
+        raise ValueError(f"Unknown JSON backend: {backend}")
+    if indent:
+        return json.dumps(obj, default=_json_default, indent=2).encode("utf-8")
+    separators = (",", ":") if compact else None
+    return json.dumps(obj, default=_json_default, separators=separators).encode("utf-8")
+
+
+def script_json(obj) -> str:
+    """``obj`` as a JSON literal that is safe inside an inline ``<script>``.
+
+    ``<`` and ``/`` are escaped so a value can never close the script element
+    (``</script>``) or open an HTML comment.
+    """
+    text = dumps_json(obj, backend="json").decode("utf-8")
+    return text.replace("<", "\\u003c").replace("/", "\\/")
+
+
+def _round_floats(obj, decimals: int = CHART_PRICE_DECIMALS):
+    """Copy of a JSON-like structure with every float rounded."""
+    if isinstance(obj, float):
+        return round(obj, decimals)
+    if isinstance(obj, dict):
+        return {key: _round_floats(value, decimals) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_round_floats(value, decimals) for value in obj]
+    return obj
+
+
+def _serialize_chart_payload(payload: dict, chart_format: str = CHART_FORMAT, compact: bool = COMPACT_JSON) -> bytes:
+    if chart_format == "columnar":
+        return dumps_json(columnar_chart_payload(payload))
+    if compact:
+        return dumps_json(_round_floats(payload))
+    return dumps_json(payload, compact=False)
+
+
+def _write_bytes(path: str, content: bytes):
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def _write_chart_payload(path: str, payload: dict, chart_format: str):
+    _write_bytes(path, _serialize_chart_payload(payload, chart_format))
+
+
+def chart_input_fingerprints(chart_data: dict, tickers) -> dict:
+    """Per-ticker digest of the raw bars (and chart settings) a payload is built from.
+
+    Computed from the downloaded frames before ``build_chart_payloads`` runs,
+    so incremental builds can skip building unchanged tickers altogether.
+    """
+    tickers = list(tickers)
+    settings = (
+        CHART_FORMAT, COMPACT_JSON, CHART_PRICE_DECIMALS, CHART_DAY_BARS, CHART_WEEK_BARS,
+        CHART_MONTH_BARS, CHART_15M_BARS, CHART_1H_BARS, CHART_2H_BARS, CHART_3H_BARS,
+    )
+    digests = {ticker: hashlib.sha1(repr(settings).encode()) for ticker in tickers}
+    for name in ("day", "m15", "h1"):
+        frame = chart_data.get(name)
+        if frame is None or frame.empty:
+            for digest in digests.values():
+                digest.update(f"{name}:none".encode())
+            continue
+        index = frame.index.asi8.tobytes()
+        fields = [
+            frame[field].reindex(columns=tickers).to_numpy(dtype="float64").T
+            if field in frame.columns.get_level_values(0)
+            else np.full((len(tickers), len(frame)), np.nan)
+            for field in ("Open", "High", "Low", "Close")
+        ]
+        for i, ticker in enumerate(tickers):
+            digest = digests[ticker]
+            digest.update(name.encode())
+            digest.update(index)
+            for values in fields:
+                digest.update(np.ascontiguousarray(values[i]).tobytes())
+    return {ticker: digest.hexdigest() for ticker, digest in digests.items()}
+
+
+def write_chart_payloads(payloads: dict, output_dir: str, chart_format: str = CHART_FORMAT, manifest=None,
+                         fingerprints: dict = None):
+    """Write one JSON file per ticker.
+
+    With a build ``manifest``, each file is keyed on its ticker's entry in
+    ``fingerprints`` (see chart_input_fingerprints); tickers skipped upstream
+    because they are unchanged have no payload and keep their file. Without
+    fingerprints, the encoded payload itself is the input.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if manifest is None:
+        for ticker, payload in payloads.items():
+            _write_chart_payload(os.path.join(output_dir, f"{ticker}.json"), payload, chart_format)
+        return
+
+    if fingerprints is None:
+        for ticker, payload in payloads.items():
+            path = os.path.join(output_dir, f"{ticker}.json")
+            encoded = _serialize_chart_payload(payload, chart_format)
+            build_artifact(manifest, path, encoded, lambda: _write_bytes(path, encoded))
+        return
+
+    for ticker, inputs in fingerprints.items():
+        path = os.path.join(output_dir, f"{ticker}.json")
+        if ticker in payloads or artifact_is_current(manifest, path, inputs):
+            build_artifact(manifest, path, inputs, lambda: _write_chart_payload(path, payloads[ticker], chart_format))
+
+
+def chart_bundle_index_url(output_dir: str) -> str:
+    """Page URL of the bundle index, cache-busted with the bundle version it describes."""
+    url = f"data/charts/{CHART_BUNDLE_INDEX_FILE}"
+    path = os.path.join(output_dir, CHART_BUNDLE_INDEX_FILE)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            url += "?v=" + json.loads(f.read())["version"]
+    return url
+
+
+def write_chart_bundle(payloads: dict, output_dir: str, chart_format: str = CHART_FORMAT):
+    """Write all payloads into one bundle file plus a ``{ticker: [offset, length]}`` index.
+
+    Each payload is one JSON line in the bundle, so the page can fetch a single
+    ticker with an HTTP Range request (or the whole file if ranges are ignored).
+    """
     if not payloads:
         return
 
     os.makedirs(output_dir, exist_ok=True)
-    for ticker, payload in payloads.items():
-        path = os.path.join(output_dir, f"{ticker}.json")
-        with open(path, "w") as f:
-            json.dump(payload, f)
+    offsets = {}
+    digest = hashlib.sha1()
+    position = 0
+    with open(os.path.join(output_dir, CHART_BUNDLE_FILE), "wb") as f:
+        for ticker, payload in payloads.items():
+            encoded = _serialize_chart_payload(payload, chart_format)
+            offsets[ticker] = [position, len(encoded)]
+            f.write(encoded + b"\n")
+            digest.update(encoded)
+            position += len(encoded) + 1
+
+    with open(os.path.join(output_dir, CHART_BUNDLE_INDEX_FILE), "wb") as f:
+        f.write(
+            dumps_json(
+                {
+                    "bundle": CHART_BUNDLE_FILE,
+                    "version": digest.hexdigest()[:12],
+                    "size": position,
+                    "tickers": offsets,
+                }
+            )
+        )
 
-def build_daily_dataset(data):
-    """Build daily dataset from downloaded history (last 2 closes)."""
-    results = []
+def _nth_last_valid(values: np.ndarray, n: int = 1) -> np.ndarray:
+    """Per column, the n-th last non-NaN value (n=1 is the last); NaN if missing."""
+    if values.shape[0] == 0:
+        return np.full(values.shape[1], np.nan)
 
-    for ticker in SP500_TICKERS:
-        try:
-            close_prices = data["Close"][ticker].dropna()
-            if len(close_prices) < 2:
-                continue
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    rank = valid.cumsum(axis=0)
+    positions = (valid & (rank == counts - n + 1)).argmax(axis=0)
+    picked = values[positions, np.arange(values.shape[1])]
+    return np.where(counts >= n, picked, np.nan)
 
-            prev_close = float(close_prices.iloc[-2])
-            current_close = float(close_prices.iloc[-1])
-            if prev_close == 0 or current_close == 0:
-                continue
 
-            change = current_close - prev_close
-            change_pct = (change / prev_close) * 100
+def _field_matrix(data, field: str, tickers) -> tuple[list, np.ndarray]:
+    """Return the tickers present in ``data[field]`` (in ``tickers`` order) and their values.
 
-            volume_series = data["Volume"][ticker].dropna()
-            volume = int(volume_series.iloc[-1]) if len(volume_series) > 0 else 0
+    ``tickers=None`` takes every column of the field.
+    """
+    try:
+        frame = data[field]
+    except Exception:
+        return [], np.empty((0, 0))
 
+    if tickers is None:
+        tickers = list(frame.columns)
+    present = [ticker for ticker in tickers if ticker in frame.columns]
+    return present, frame[present].to_numpy(dtype=float)
+
+
+def build_daily_dataset(data, tickers=None):
+    """Build daily dataset from downloaded history (last 2 closes).
+
+    ``tickers`` limits (and orders) the universe; defaults to every column.
+
+    Works column-wise on the wide Close/Volume frames: each ticker's last and
+    previous valid close (and last valid volume) are picked in one array pass.
+    """
+    results = []
+
+    tickers, closes = _field_matrix(data, "Close", tickers)
+    if tickers:
+        current_closes = _nth_last_valid(closes, 1)
+        prev_closes = _nth_last_valid(closes, 2)
+        changes = current_closes - prev_closes
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change_pcts = (changes / prev_closes) * 100
+
+        volume_tickers, volume_values = _field_matrix(data, "Volume", tickers)
+        last_volumes = pd.Series(_nth_last_valid(volume_values, 1), index=volume_tickers, dtype=float)
+        last_volumes = last_volumes.reindex(tickers).fillna(0).to_numpy()
+
+        usable = ~np.isnan(prev_closes) & (prev_closes != 0) & (current_closes != 0)
+        for i in np.flatnonzero(usable):
+            volume = int(last_volumes[i])
             results.append(
                 {
-                    "ticker": ticker,
-                    "price": round(current_close, 2),
-                    "prev_close": round(prev_close, 2),
-                    "change": round(change, 2),
-                    "change_pct": round(change_pct, 2),
+                    "ticker": tickers[i],
+                    "price": round(float(current_closes[i]), 2),
+                    "prev_close": round(float(prev_closes[i]), 2),
+                    "change": round(float(changes[i]), 2),
+                    "change_pct": round(float(change_pcts[i]), 2),
                     "volume": volume if volume > 0 else 0,
                 }
             )
-        except Exception:
-            continue
 
     dates = list(getattr(data, "index", []))
     meta = {
@@ -381,49 +1257,52 @@ def get_week_date_range(reference_dt: datetime) -> tuple[date, date]:
     return start_date, end_date
 
 
-def build_weekly_dataset(data, start_date: date, end_date: date):
-    """Build weekly dataset from downloaded history (Mon-Fri date range)."""
-    results = []
-
-    for ticker in SP500_TICKERS:
-        try:
-            close_prices = data["Close"][ticker].dropna()
-            if len(close_prices) < 2:
-                continue
-
-            trading_days = close_prices[
-                (close_prices.index.date >= start_date) & (close_prices.index.date <= end_date)
-            ]
-            if len(trading_days) < 2:
-                continue
+def build_weekly_dataset(data, start_date: date, end_date: date, tickers=None):
+    """Build weekly dataset from downloaded history (Mon-Fri date range).
 
-            start_price = float(trading_days.iloc[0])
-            end_price = float(trading_days.iloc[-1])
-            if start_price == 0 or end_price == 0:
-                continue
+    ``tickers`` limits (and orders) the universe; defaults to every column.
 
-            change = end_price - start_price
-            change_pct = (change / start_price) * 100
-
-            volume_series = data["Volume"][ticker].dropna()
-            volume_series = volume_series[
-                (volume_series.index.date >= start_date) & (volume_series.index.date <= end_date)
-            ]
-            avg_volume = int(volume_series.mean()) if len(volume_series) > 0 else 0
+    The date mask is built once on the shared index; first/last valid close,
+    mean volume and day counts are then taken for every ticker in one pass.
+    """
+    results = []
 
+    tickers, closes = _field_matrix(data, "Close", tickers)
+    if tickers:
+        index_dates = data.index.date
+        in_week = (index_dates >= start_date) & (index_dates <= end_date)
+
+        week_closes = closes[in_week]
+        days = (~np.isnan(week_closes)).sum(axis=0)
+        start_prices = _nth_last_valid(week_closes[::-1], 1)
+        end_prices = _nth_last_valid(week_closes, 1)
+        changes = end_prices - start_prices
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change_pcts = (changes / start_prices) * 100
+
+        volume_tickers, volume_values = _field_matrix(data, "Volume", tickers)
+        week_volumes = volume_values[in_week] if volume_tickers else volume_values
+        volume_valid = ~np.isnan(week_volumes)
+        volume_counts = volume_valid.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_volumes = np.where(volume_valid, week_volumes, 0).sum(axis=0) / volume_counts
+        mean_volumes = pd.Series(np.where(volume_counts > 0, mean_volumes, 0), index=volume_tickers, dtype=float)
+        mean_volumes = mean_volumes.reindex(tickers).fillna(0).to_numpy()
+
+        usable = (days >= 2) & (start_prices != 0) & (end_prices != 0)
+        for i in np.flatnonzero(usable):
+            avg_volume = int(mean_volumes[i])
             results.append(
                 {
-                    "ticker": ticker,
-                    "start_price": round(start_price, 2),
-                    "end_price": round(end_price, 2),
-                    "change": round(change, 2),
-                    "change_pct": round(change_pct, 2),
+                    "ticker": tickers[i],
+                    "start_price": round(float(start_prices[i]), 2),
+                    "end_price": round(float(end_prices[i]), 2),
+                    "change": round(float(changes[i]), 2),
+                    "change_pct": round(float(change_pcts[i]), 2),
                     "avg_volume": avg_volume if avg_volume > 0 else 0,
-                    "days": int(len(trading_days)),
+                    "days": int(days[i]),
                 }
             )
-        except Exception:
-            continue
 
     dates = list(getattr(data, "index", []))
     dates_in_range = [d for d in dates if start_date <= d.date() <= end_date]
@@ -438,69 +1317,663 @@ def build_weekly_dataset(data, start_date: date, end_date: date):
     return results, meta
 
 
+def _window_base_positions(index: pd.DatetimeIndex) -> dict:
+    """Row position of each RETURN_WINDOWS base close (windows without enough history are left out)."""
+    positions = {}
+    end = index[-1]
+    for name, window in RETURN_WINDOWS.items():
+        if isinstance(window, int):
+            position = len(index) - 1 - window
+        elif window == "ytd":
+            position = index.searchsorted(pd.Timestamp(end.year, 1, 1), side="left") - 1
+        else:
+            # Last session on or before the calendar cutoff
+            position = index.searchsorted(end - window, side="right") - 1
+        if position >= 0:
+            positions[name] = position
+    return positions
+
+
+def build_returns_dataset(data, tickers=None) -> dict:
+    """Build returns for every RETURN_WINDOWS lookback from one close matrix.
+
+    Closes are forward-filled over gaps, then every window's base row is
+    gathered at once so all windows x tickers returns come from one array op.
+    Returns ``{window: {"start_date", "end_date", "stocks"}}``.
+    """
+    tickers, closes = _field_matrix(data, "Close", tickers)
+    if not tickers or not len(closes):
+        return {}
+
+    filled = pd.DataFrame(closes).ffill().to_numpy()
+    positions = _window_base_positions(pd.DatetimeIndex(data.index))
+    missing = [name for name in RETURN_WINDOWS if name not in positions]
+    if missing:
+        print(
+            f"   ⚠️  Not enough history for return windows {', '.join(name.upper() for name in missing)}: "
+            f"{len(data.index)} sessions from {data.index[0].date()} (they are left out of the returns outputs)"
+        )
+    names = list(positions)
+    if not names:
+        return {}
+
+    end_prices = filled[-1]
+    base_prices = filled[[positions[name] for name in names]]
+    changes = end_prices - base_prices
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_pcts = (changes / base_prices) * 100
+    usable = ~np.isnan(changes) & (base_prices != 0) & (end_prices != 0)
+
+    end_date = data.index[-1].date().isoformat()
+    windows = {}
+    for w, name in enumerate(names):
+        windows[name] = {
+            "start_date": data.index[positions[name]].date().isoformat(),
+            "end_date": end_date,
+            "stocks": [
+                {
+                    "ticker": tickers[i],
+                    "price": round(float(end_prices[i]), 2),
+                    "base_price": round(float(base_prices[w, i]), 2),
+                    "change": round(float(changes[w, i]), 2),
+                    "change_pct": round(float(change_pcts[w, i]), 2),
+                }
+                for i in np.flatnonzero(usable[w])
+            ],
+        }
+
+    print(f"Built returns for windows: {', '.join(name.upper() for name in names)}")
+    return windows
+
+
+def rank_stocks(stocks, limit=20, key="change_pct") -> dict:
+    """Rank stocks by ``key`` with a single sort.
+
+    Returns ``{"all", "gainers", "losers"}``: the full ranking (highest first),
+    the top ``limit`` with a positive value and the bottom ``limit`` with a
+    negative value (lowest first).
+    """
+    ranked = sorted(stocks, key=lambda x: x[key], reverse=True)
+
+    # Positives form a prefix and negatives a suffix of the descending ranking
+    positives = sum(1 for s in ranked if s[key] > 0)
+    negatives = sum(1 for s in ranked if s[key] < 0)
+    gainers = ranked[:min(limit, positives)]
+    losers = ranked[len(ranked) - min(limit, negatives):]
+    losers.reverse()
+
+    return {"all": ranked, "gainers": gainers, "losers": losers}
+
+
 def get_top_movers(stocks, limit=20):
     """Get top gainers and losers from the stock list"""
-    sorted_stocks = sorted(stocks, key=lambda x: x['change_pct'], reverse=True)
-    
-    gainers = [s for s in sorted_stocks if s['change_pct'] > 0][:limit]
-    losers = [s for s in sorted_stocks if s['change_pct'] < 0][-limit:]
-    losers.reverse()
-    
-    return gainers, losers
+    ranking = rank_stocks(stocks, limit=limit)
+    return ranking["gainers"], ranking["losers"]
+
+
+def stocks_frame(stocks, columns: dict) -> pd.DataFrame:
+    """Typed frame of stock records (in order) with a 1-based ``rank`` column."""
+    data = {"rank": np.arange(1, len(stocks) + 1, dtype="int32")}
+    for name, dtype in columns.items():
+        default = 0 if dtype == "int64" else None
+        values = [stock.get(name, default) for stock in stocks]
+        if dtype == "string":
+            data[name] = pd.array(values, dtype="string")
+        else:
+            data[name] = np.array(values, dtype=dtype if default is not None else "float64")
+    return pd.DataFrame(data)
+
+
+def chart_ohlc_frame(payloads: dict) -> pd.DataFrame:
+    """Long OHLC table (ticker, range, time, open, high, low, close) of chart payloads."""
+    parts = []
+    for ticker, payload in payloads.items():
+        for chart_range in CHART_RANGES:
+            candles = payload.get(chart_range) or []
+            if not candles:
+                continue
+            part = pd.DataFrame.from_records(candles, columns=["time", "open", "high", "low", "close"])
+            part.insert(0, "range", chart_range)
+            part.insert(0, "ticker", ticker)
+            parts.append(part)
+    if not parts:
+        frame = pd.DataFrame(columns=["ticker", "range", "time", "open", "high", "low", "close"])
+    else:
+        frame = pd.concat(parts, ignore_index=True)
+
+    frame["ticker"] = frame["ticker"].astype("category")
+    frame["range"] = pd.Categorical(frame["range"], categories=list(CHART_RANGES))
+    frame["time"] = pd.to_datetime(frame["time"].astype("int64"), unit="s", utc=True)
+    return frame.astype({field: "float64" for field in ("open", "high", "low", "close")})
+
+
+def write_parquet(frame: pd.DataFrame, path: str):
+    tmp_path = f"{path}.tmp"
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    print(f"Generated {path}")
+
+
+DAILY_CSV_HEADERS = {
+    "ticker": "Symbol",
+    "price": "Price ($)",
+    "prev_close": "Previous Close ($)",
+    "change": "Change ($)",
+    "change_pct": "Change (%)",
+    "volume": "Volume",
+}
+WEEKLY_CSV_HEADERS = {
+    "ticker": "Symbol",
+    "start_price": "Week Start ($)",
+    "end_price": "Week End ($)",
+    "change": "Change ($)",
+    "change_pct": "Change (%)",
+    "avg_volume": "Avg Volume",
+    "days": "Days",
+}
+
+
+_CSV_NEEDS_QUOTES = re.compile(r'[",\r\n]')
+
+
+def _csv_cells(values: pd.Series, dtype: str) -> list:
+    """Render one typed column the way csv.writer would (repr floats, minimal quoting)."""
+    if dtype == "float64":
+        return list(map(repr, values.tolist()))
+    cells = list(map(str, values.tolist()))
+    if dtype == "string" and any(map(_CSV_NEEDS_QUOTES.search, cells)):
+        cells = [
+            '"' + cell.replace('"', '""') + '"' if _CSV_NEEDS_QUOTES.search(cell) else cell
+            for cell in cells
+        ]
+    return cells
+
+
+def csv_rows(stocks, columns: dict, headers: dict) -> tuple:
+    """Header and CSV lines (without rank) of ranked stocks, formatted once.
+
+    Cells are rendered column by column from the typed frame; gainer/loser
+    files are slices of the full ranking, so no record is formatted twice.
+    """
+    frame = stocks_frame(stocks, columns)
+    cells = [
+        list(map("{:+.2f}%".format, frame[name].tolist())) if name == "change_pct" else _csv_cells(frame[name], dtype)
+        for name, dtype in columns.items()
+    ]
+    header = _csv_cells(pd.Series(["Rank", *(headers[name] for name in columns)]), "string")
+    return ",".join(header), list(map(",".join, zip(*cells)))
+
+
+def write_csv_rows(header: str, rows: list, filename: str):
+    """Write CSV lines, numbering them from 1 (Excel-friendly)."""
+    lines = map("{},{}".format, range(1, len(rows) + 1), rows)
+    with open(filename, "w", newline="") as f:
+        f.write("\r\n".join([header, *lines]) + "\r\n")
+    print(f"Generated {filename}")
 
 
 def generate_daily_csv(stocks, filename):
     """Generate daily CSV file for download (Excel-friendly)."""
-    import csv
-    
-    with open(filename, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Rank', 'Symbol', 'Price ($)', 'Previous Close ($)', 'Change ($)', 'Change (%)', 'Volume'])
-        for i, stock in enumerate(stocks, 1):
-            writer.writerow([
-                i,
-                stock['ticker'],
-                stock['price'],
-                stock['prev_close'],
-                stock['change'],
-                f"{stock['change_pct']:+.2f}%",
-                stock['volume']
-            ])
-    print(f"Generated {filename}")
+    write_csv_rows(*csv_rows(stocks, DAILY_COLUMNS, DAILY_CSV_HEADERS), filename)
 
 
 def generate_weekly_csv(stocks, filename):
     """Generate weekly CSV file for download (Excel-friendly)."""
-    import csv
+    write_csv_rows(*csv_rows(stocks, WEEKLY_COLUMNS, WEEKLY_CSV_HEADERS), filename)
 
-    with open(filename, "w", newline="") as f:
+
+def write_page_data(content: bytes, path: str):
+    with open(path, "wb") as f:
+        f.write(content)
+    print(f"Generated {path}")
+
+
+def _search_key(text: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", text.upper())
+
+
+def _trigrams(key: str) -> set:
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+def build_search_index(members, daily_stocks, weekly_stocks, chart_tickers=()) -> dict:
+    """Columnar search index over every universe member (not just the movers).
+
+    Rows are sorted by normalized symbol, so the page finds symbol prefixes by
+    binary search; longer queries intersect the trigram postings of symbols
+    and names. Postings are ascending row ids, delta-encoded.
+    """
+    daily = {stock["ticker"]: stock for stock in daily_stocks}
+    weekly = {stock["ticker"]: stock for stock in weekly_stocks}
+    charts = set(chart_tickers)
+    members = sorted(members, key=lambda member: (_search_key(member["symbol"]), member["symbol"]))
+
+    postings = {}
+    for row, member in enumerate(members):
+        grams = _trigrams(_search_key(member["symbol"])) | _trigrams(_search_key(member.get("name", "")))
+        for gram in grams:
+            postings.setdefault(gram, []).append(row)
+
+    symbols = [member["symbol"] for member in members]
+    names = [member.get("name", "") for member in members]
+    return {
+        "symbols": symbols,
+        "names": names if any(names) else [],
+        "price": [daily[symbol]["price"] if symbol in daily else None for symbol in symbols],
+        "daily": [daily[symbol]["change_pct"] if symbol in daily else None for symbol in symbols],
+        "weekly": [weekly[symbol]["change_pct"] if symbol in weekly else None for symbol in symbols],
+        "charts": [row for row, symbol in enumerate(symbols) if symbol in charts],
+        "trigrams": {
+            gram: [rows[0]] + [b - a for a, b in zip(rows, rows[1:])]
+            for gram, rows in sorted(postings.items())
+        },
+    }
+
+
+def generate_returns_outputs(windows: dict, output_dir: str, limit: int = 20):
+    """Write multi-window returns: returns.json (top movers per window) and all_stocks.csv."""
+    os.makedirs(output_dir, exist_ok=True)
+
+    summary = {}
+    by_ticker = {}
+    for name, window in windows.items():
+        ranking = rank_stocks(window["stocks"], limit=limit)
+        summary[name] = {
+            "start_date": window["start_date"],
+            "end_date": window["end_date"],
+            "gainers": ranking["gainers"],
+            "losers": ranking["losers"],
+        }
+        for stock in window["stocks"]:
+            row = by_ticker.setdefault(stock["ticker"], {"price": stock["price"]})
+            row[name] = stock["change_pct"]
+
+    json_path = os.path.join(output_dir, "returns.json")
+    with open(json_path, "wb") as f:
+        f.write(dumps_json({"windows": summary}, compact=False))
+    print(f"Generated {json_path}")
+
+    csv_path = os.path.join(output_dir, "all_stocks.csv")
+    with open(csv_path, "w", newline="") as f:
         writer = csv.writer(f)
-        writer.writerow(
-            [
-                "Rank",
-                "Symbol",
-                "Week Start ($)",
-                "Week End ($)",
-                "Change ($)",
-                "Change (%)",
-                "Avg Volume",
-                "Days",
-            ]
-        )
-        for i, stock in enumerate(stocks, 1):
+        writer.writerow(["Symbol", "Price ($)", *[f"{name.upper()} (%)" for name in windows]])
+        for ticker in sorted(by_ticker):
+            row = by_ticker[ticker]
             writer.writerow(
                 [
-                    i,
-                    stock["ticker"],
-                    stock["start_price"],
-                    stock["end_price"],
-                    stock["change"],
-                    f"{stock['change_pct']:+.2f}%",
-                    stock.get("avg_volume", 0),
-                    stock.get("days", 0),
+                    ticker,
+                    row["price"],
+                    *[f"{row[name]:+.2f}%" if name in row else "" for name in windows],
                 ]
             )
-    print(f"Generated {filename}")
+    print(f"Generated {csv_path}")
+
+
+def _generator_digest() -> bytes:
+    h = hashlib.sha1()
+    with open(__file__, "rb") as f:
+        h.update(f.read())
+    with open(os.path.join(TEMPLATE_DIR, "index.html"), "rb") as f:
+        h.update(f.read())
+    for url, _ in static_assets().values():
+        h.update(url.encode())
+    return h.digest()
+
+
+def load_build_manifest(output_dir: str, enabled: bool = INCREMENTAL_BUILD) -> dict:
+    """Load the artifact -> input fingerprint manifest of the previous build."""
+    path = os.path.join(output_dir, BUILD_MANIFEST_FILE)
+    artifacts = {}
+    if enabled and os.path.exists(path):
+        try:
+            with open(path) as f:
+                artifacts = json.load(f).get("artifacts", {})
+        except (OSError, ValueError):
+            artifacts = {}
+
+    return {
+        "enabled": enabled,
+        "path": path,
+        "generator": _generator_digest(),
+        "artifacts": artifacts,
+        "rebuilt": [],
+        "skipped": [],
+    }
+
+
+def save_build_manifest(manifest: dict):
+    if not manifest["enabled"]:
+        # Outputs written without the manifest make an older one stale: drop it
+        # (it would otherwise be deployed and trusted by the next incremental run)
+        if os.path.exists(manifest["path"]):
+            os.remove(manifest["path"])
+        return
+    with open(manifest["path"], "w") as f:
+        json.dump({"artifacts": manifest["artifacts"]}, f, indent=2, sort_keys=True)
+
+
+def _artifact_fingerprint(manifest: dict, inputs) -> str:
+    digest = hashlib.sha1(manifest["generator"])
+    digest.update(inputs if isinstance(inputs, bytes) else dumps_json(inputs))
+    return digest.hexdigest()
+
+
+def artifact_is_current(manifest: dict, paths, inputs) -> bool:
+    """True if incremental builds are on and ``paths`` were last built from ``inputs``."""
+    paths = [paths] if isinstance(paths, str) else list(paths)
+    return (
+        manifest["enabled"]
+        and manifest["artifacts"].get(paths[0]) == _artifact_fingerprint(manifest, inputs)
+        and all(os.path.exists(path) for path in paths)
+    )
+
+
+def build_artifact(manifest: dict, paths, inputs, build) -> bool:
+    """Call ``build()`` unless ``paths`` exist and were last built from the same ``inputs``.
+
+    ``inputs`` is raw bytes (e.g. already-encoded output) or anything
+    ``dumps_json`` accepts; ``paths`` is one path or a list of paths produced
+    together (the first one keys the manifest). Fingerprints are only
+    computed when incremental builds are on.
+    """
+    paths = [paths] if isinstance(paths, str) else list(paths)
+    key = paths[0]
+    if not manifest["enabled"]:
+        build()
+        manifest["rebuilt"].append(key)
+        return True
+
+    fingerprint = _artifact_fingerprint(manifest, inputs)
+    if manifest["artifacts"].get(key) == fingerprint and all(os.path.exists(path) for path in paths):
+        manifest["skipped"].append(key)
+        return False
+
+    build()
+    manifest["artifacts"][key] = fingerprint
+    manifest["rebuilt"].append(key)
+    return True
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def new_build_metrics(log_path: str = METRICS_LOG) -> dict:
+    """Empty metrics record for one build (see build_stage/log_metric)."""
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "stages": [],
+        "counters": {},
+        "downloads": [],
+        "artifacts": {},
+        "log_path": log_path,
+    }
+
+
+def log_metric(metrics: dict, event: str, **fields):
+    """Append one JSON-lines event to the metrics log, if one is configured."""
+    log_path = metrics.get("log_path")
+    if not log_path:
+        return
+    line = json.dumps({"event": event, "time": datetime.now(timezone.utc).isoformat(), **fields}, default=str)
+    if log_path == "-":
+        print(line, flush=True)
+    else:
+        with open(log_path, "a") as f:
+            f.write(line + "\n")
+
+
+def _profiled(name: str, stages=None) -> bool:
+    stages = PROFILE_STAGES if stages is None else stages
+    return name in stages or "all" in stages
+
+
+def _short_location(filename: str, line: int, func: str) -> str:
+    return f"{func} ({os.path.basename(filename)}:{line})"
+
+
+def _thread_profiler_hook(started: list):
+    """``threading.setprofile`` hook giving each new thread its own profiler.
+
+    cProfile only sees the thread that enabled it, so download workers and
+    chart stages are profiled separately; ``(thread, profiler)`` pairs are
+    appended to ``started``.
+    """
+    def start_profiler(frame, event, arg):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()  # replaces this hook for the rest of the thread
+        except ValueError:  # Python 3.12+: the stage profiler already sees every thread
+            sys.setprofile(None)
+            return
+        started.append((threading.current_thread(), profiler))
+
+    return start_profiler
+
+
+def write_cprofile_report(profilers: list, name: str, profile_dir: str = PROFILE_DIR,
+                          top: int = PROFILE_TOP) -> str:
+    """Dump ``<name>.pstats`` (all ``profilers`` merged) and print the functions with the most own time."""
+    path = os.path.join(profile_dir, f"{name}.pstats")
+    stats = pstats.Stats(*profilers)
+    stats.dump_stats(path)
+
+    # stats.stats: (file, line, func) -> (primitive calls, calls, own time, cumulative time, callers)
+    hotspots = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    print(f"   🔥 {name}: top {len(hotspots)} functions by own time ({path})")
+    for (filename, line, func), (_, calls, own, cumulative, _) in hotspots:
+        print(f"      {own * 1000:9.1f} ms own {cumulative * 1000:9.1f} ms cum {calls:>8} calls  {_short_location(filename, line, func)}")
+    return path
+
+
+def write_tracemalloc_report(snapshot: tracemalloc.Snapshot, peak: int, name: str,
+                             profile_dir: str = PROFILE_DIR, top: int = PROFILE_TOP) -> str:
+    """Write the top allocation sites of a stage to ``<name>.alloc.txt`` and print a summary."""
+    path = os.path.join(profile_dir, f"{name}.alloc.txt")
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    statistics = snapshot.statistics("traceback")[:top]
+    with open(path, "w") as f:
+        f.write(f"# {name}: traced peak {peak / 2**20:.1f} MiB, top {len(statistics)} live allocation sites\n")
+        for stat in statistics:
+            f.write(f"\n{stat.size / 2**20:.2f} MiB in {stat.count} blocks\n")
+            f.write("\n".join(stat.traceback.format(most_recent_first=True)) + "\n")
+
+    print(f"   🧠 {name}: traced peak {peak / 2**20:.1f} MiB, top allocating lines ({path})")
+    for stat in snapshot.statistics("lineno")[:5]:
+        frame = stat.traceback[0]
+        print(f"      {stat.size / 2**20:9.2f} MiB {stat.count:>8} blocks  {os.path.basename(frame.filename)}:{frame.lineno}")
+    return path
+
+
+@contextlib.contextmanager
+def build_stage(metrics: dict, name: str):
+    """Time a pipeline stage and record it (with the process peak RSS) in ``metrics``.
+
+    Stages selected by MARKET_MOVERS_PROFILE also run under cProfile and/or
+    tracemalloc (MARKET_MOVERS_PROFILE_MODE); their reports go to PROFILE_DIR.
+    Threads started inside a profiled stage get their own cProfile profiler,
+    merged into the stage report once they finish.
+    """
+    profiler = None
+    thread_profilers = []
+    tracing = False
+    if _profiled(name):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if "tracemalloc" in PROFILE_MODES and not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACE_FRAMES)
+            tracing = True
+        if "cprofile" in PROFILE_MODES:
+            profiler = cProfile.Profile()
+            threading.setprofile(_thread_profiler_hook(thread_profilers))
+            profiler.enable()
+
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "failed"
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        record = {
+            "stage": name,
+            "status": status,
+            "seconds": round(seconds, 3),
+            "peak_rss_bytes": _peak_rss_bytes(),
+        }
+        if profiler is not None:
+            profiler.disable()
+            threading.setprofile(None)
+        if tracing:
+            # Snapshot before writing any report so the reports don't show up in it
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            record["traced_peak_bytes"] = peak
+            record["allocations"] = write_tracemalloc_report(snapshot, peak, name)
+        if profiler is not None:
+            # Threads still running (e.g. abandoned chart stages) are left out
+            finished = [worker for thread, worker in thread_profilers if not thread.is_alive()]
+            if len(finished) < len(thread_profilers):
+                print(f"   ⚠️  {name}: {len(thread_profilers) - len(finished)} thread(s) still running, not profiled")
+            record["pstats"] = write_cprofile_report([profiler, *finished], name)
+            record["profiled_threads"] = len(finished)
+        metrics["stages"].append(record)
+        log_metric(metrics, "stage", **record)
+
+
+def write_build_metrics(metrics: dict, output_dir: str) -> str:
+    """Add artifact sizes and totals, then write ``build-metrics.json``."""
+    path = os.path.join(output_dir, BUILD_METRICS_FILE)
+    artifacts = {}
+    for root, _, filenames in os.walk(output_dir):
+        for filename in filenames:
+            file_path = os.path.join(root, filename)
+            if file_path != path and not filename.startswith("."):
+                artifacts[os.path.relpath(file_path, output_dir)] = os.path.getsize(file_path)
+
+    report = {key: value for key, value in metrics.items() if key != "log_path"}
+    report["finished_at"] = datetime.now(timezone.utc).isoformat()
+    report["artifacts"] = dict(sorted(artifacts.items()))
+    report["totals"] = {
+        "seconds": round(sum(stage["seconds"] for stage in metrics["stages"]), 3),
+        "artifacts": len(artifacts),
+        "bytes": sum(artifacts.values()),
+        "peak_rss_bytes": _peak_rss_bytes(),
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    log_metric(metrics, "build", counters=metrics["counters"], **report["totals"])
+    return path
+
+
+def _compress_file(path: str, suffix: str, compress) -> bool:
+    target = path + suffix
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+        return False
+    with open(path, "rb") as f:
+        content = compress(f.read())
+    with open(target, "wb") as f:
+        f.write(content)
+    return True
+
+
+def precompress_outputs(output_dir: str, extensions=PRECOMPRESS_EXTENSIONS) -> dict:
+    """Write ``.gz``/``.br`` siblings for text artifacts under ``output_dir``.
+
+    Siblings newer than their source are kept; siblings whose source is gone
+    are removed. Brotli is skipped when the package is not installed.
+    """
+    encoders = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoders[".br"] = lambda data: brotli.compress(data, quality=11)
+
+    counts = {"written": 0, "unchanged": 0, "removed": 0}
+    for root, _, filenames in os.walk(output_dir):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            base, ext = os.path.splitext(path)
+            if ext in (".gz", ".br"):
+                if not os.path.exists(base):
+                    os.remove(path)
+                    counts["removed"] += 1
+                continue
+            if filename.startswith(".") or ext not in extensions:
+                continue
+            for suffix, compress in encoders.items():
+                if _compress_file(path, suffix, compress):
+                    counts["written"] += 1
+                else:
+                    counts["unchanged"] += 1
+
+    print(
+        f"   {' + '.join(name.lstrip('.') for name in encoders)}: "
+        f"{counts['written']} written, {counts['unchanged']} unchanged, {counts['removed']} stale removed"
+    )
+    if brotli is None:
+        print("   (install the 'brotli' package for .br output)")
+    return counts
+
+
+@functools.lru_cache(maxsize=None)
+def _load_template(name: str) -> string.Template:
+    with open(os.path.join(TEMPLATE_DIR, name), encoding="utf-8") as f:
+        return string.Template(f.read())
+
+
+@functools.lru_cache(maxsize=None)
+def _template_parts(name: str) -> tuple:
+    """Split a template into (literal text, placeholder name or None) pairs."""
+    template = _load_template(name)
+    parts, pos = [], 0
+    for match in template.pattern.finditer(template.template):
+        literal = template.template[pos:match.start()]
+        pos = match.end()
+        if match.group("escaped") is not None:
+            parts.append((literal + template.delimiter, None))
+        elif match.group("invalid") is not None:
+            raise ValueError(f"Invalid placeholder in {name} at offset {match.start()}")
+        else:
+            parts.append((literal, match.group("named") or match.group("braced")))
+    parts.append((template.template[pos:], None))
+    return tuple(parts)
+
+
+@functools.lru_cache(maxsize=None)
+def static_assets() -> dict:
+    """Read the static assets once: name -> (fingerprinted URL, content bytes)."""
+    assets = {}
+    for name in STATIC_ASSETS:
+        with open(os.path.join(ASSET_DIR, name), "rb") as f:
+            content = f.read()
+        stem, ext = os.path.splitext(name)
+        digest = hashlib.sha1(content).hexdigest()[:10]
+        assets[name] = (f"assets/{stem}.{digest}{ext}", content)
+    return assets
+
+
+def write_static_assets(output_dir: str):
+    """Publish the fingerprinted assets, dropping stale fingerprints."""
+    assets = static_assets()
+    asset_dir = os.path.join(output_dir, "assets")
+    os.makedirs(asset_dir, exist_ok=True)
+    current = {os.path.basename(url) for url, _ in assets.values()}
+    for filename in os.listdir(asset_dir):
+        base, ext = os.path.splitext(filename)
+        # Precompressed siblings of a current asset stay (see precompress_outputs)
+        if filename not in current and not (ext in (".gz", ".br") and base in current):
+            os.remove(os.path.join(asset_dir, filename))
+    for url, content in assets.values():
+        path = os.path.join(output_dir, url)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(content)
+    return [url for url, _ in assets.values()]
 
 
 def _pretty_date(iso_date: str, fmt: str = "%b %d, %Y") -> str:
@@ -512,7 +1985,8 @@ def _pretty_date(iso_date: str, fmt: str = "%b %d, %Y") -> str:
         return iso_date
 
 
-def generate_html(
+def stream_html(
+    out,
     daily_gainers,
     daily_losers,
     daily_all_stocks,
@@ -522,8 +1996,26 @@ def generate_html(
     weekly_all_stocks,
     weekly_meta,
     generated_at_et: datetime,
+    universe_label: str = "S&P 500",
+    chart_bundle: bool = False,
+    dataset_urls: dict = None,
+    chart_index_url: str = None,
 ):
-    """Generate the main HTML page (Daily + Weekly views)."""
+    """Write the main HTML page (Daily + Weekly views) to the text stream *out*.
+
+    Table rows are emitted piece by piece, so the page is never held in
+    memory as one string. Only the top gainers/losers are inlined (copied to
+    the clipboard synchronously, inside the click); the page fetches the
+    search index from ``dataset_urls`` ({"search": url}) on demand. ``chart_index_url`` should carry the bundle
+    version (see chart_bundle_index_url) so a cached index is never paired
+    with a newer bundle.
+    """
+    if dataset_urls is None:
+        dataset_urls = {"search": f"data/{SEARCH_INDEX_FILE}"}
+    movers = {
+        "daily": {"gainers": daily_gainers, "losers": daily_losers},
+        "weekly": {"gainers": weekly_gainers, "losers": weekly_losers},
+    }
 
     generated_str = generated_at_et.strftime("%b %d, %Y %I:%M %p %Z")
 
@@ -538,59 +2030,64 @@ def generate_html(
     weekly_subtitle = "Weekly Movers (Mon-Fri)"
     default_view = "weekly" if (generated_at_et.weekday() >= 5 and len(weekly_all_stocks) > 0) else "daily"
 
+    # Table rows are lazy generators, consumed while the page is written
     # Generate table rows for DAILY gainers
-    daily_gainers_rows = ""
-    for i, stock in enumerate(daily_gainers, 1):
-        daily_gainers_rows += f'''
-            <tr class="clickable-row" data-ticker="{stock['ticker']}" tabindex="0" role="button" aria-label="Open chart for {stock['ticker']}">
+    daily_gainers_rows = (
+        f'''
+            <tr class="clickable-row" data-ticker="{html.escape(stock['ticker'])}" tabindex="0" role="button" aria-label="Open chart for {html.escape(stock['ticker'])}">
                 <td class="rank">{i}</td>
-                <td class="symbol">{stock['ticker']}</td>
+                <td class="symbol">{html.escape(stock['ticker'])}</td>
                 <td class="price">${stock['price']:.2f}</td>
                 <td class="change positive">+${stock['change']:.2f}</td>
                 <td class="change-pct positive">+{stock['change_pct']:.2f}%</td>
                 <td class="volume">{stock['volume']:,}</td>
             </tr>'''
+        for i, stock in enumerate(daily_gainers, 1)
+    )
 
     # Generate table rows for DAILY losers
-    daily_losers_rows = ""
-    for i, stock in enumerate(daily_losers, 1):
-        daily_losers_rows += f'''
-            <tr class="clickable-row" data-ticker="{stock['ticker']}" tabindex="0" role="button" aria-label="Open chart for {stock['ticker']}">
+    daily_losers_rows = (
+        f'''
+            <tr class="clickable-row" data-ticker="{html.escape(stock['ticker'])}" tabindex="0" role="button" aria-label="Open chart for {html.escape(stock['ticker'])}">
                 <td class="rank">{i}</td>
-                <td class="symbol">{stock['ticker']}</td>
+                <td class="symbol">{html.escape(stock['ticker'])}</td>
                 <td class="price">${stock['price']:.2f}</td>
                 <td class="change negative">${stock['change']:.2f}</td>
                 <td class="change-pct negative">{stock['change_pct']:.2f}%</td>
                 <td class="volume">{stock['volume']:,}</td>
             </tr>'''
+        for i, stock in enumerate(daily_losers, 1)
+    )
 
     # Generate table rows for WEEKLY gainers
-    weekly_gainers_rows = ""
-    for i, stock in enumerate(weekly_gainers, 1):
-        weekly_gainers_rows += f'''
-            <tr class="clickable-row" data-ticker="{stock['ticker']}" tabindex="0" role="button" aria-label="Open chart for {stock['ticker']}">
+    weekly_gainers_rows = (
+        f'''
+            <tr class="clickable-row" data-ticker="{html.escape(stock['ticker'])}" tabindex="0" role="button" aria-label="Open chart for {html.escape(stock['ticker'])}">
                 <td class="rank">{i}</td>
-                <td class="symbol">{stock['ticker']}</td>
+                <td class="symbol">{html.escape(stock['ticker'])}</td>
                 <td class="price">${stock['start_price']:.2f}</td>
                 <td class="price">${stock['end_price']:.2f}</td>
                 <td class="change positive">+${stock['change']:.2f}</td>
                 <td class="change-pct positive">+{stock['change_pct']:.2f}%</td>
                 <td class="volume">{stock.get('avg_volume', 0):,}</td>
             </tr>'''
+        for i, stock in enumerate(weekly_gainers, 1)
+    )
 
     # Generate table rows for WEEKLY losers
-    weekly_losers_rows = ""
-    for i, stock in enumerate(weekly_losers, 1):
-        weekly_losers_rows += f'''
-            <tr class="clickable-row" data-ticker="{stock['ticker']}" tabindex="0" role="button" aria-label="Open chart for {stock['ticker']}">
+    weekly_losers_rows = (
+        f'''
+            <tr class="clickable-row" data-ticker="{html.escape(stock['ticker'])}" tabindex="0" role="button" aria-label="Open chart for {html.escape(stock['ticker'])}">
                 <td class="rank">{i}</td>
-                <td class="symbol">{stock['ticker']}</td>
+                <td class="symbol">{html.escape(stock['ticker'])}</td>
                 <td class="price">${stock['start_price']:.2f}</td>
                 <td class="price">${stock['end_price']:.2f}</td>
                 <td class="change negative">${stock['change']:.2f}</td>
                 <td class="change-pct negative">{stock['change_pct']:.2f}%</td>
                 <td class="volume">{stock.get('avg_volume', 0):,}</td>
             </tr>'''
+        for i, stock in enumerate(weekly_losers, 1)
+    )
 
     # Calculate market summary (DAILY)
     daily_total_gainers = len([s for s in daily_all_stocks if s["change_pct"] > 0])
@@ -610,1343 +2107,54 @@ def generate_html(
     )
     weekly_avg_class = "gainers" if weekly_avg_change >= 0 else "losers"
 
-    # Convert data to JSON for JavaScript
-    daily_all_stocks_json = json.dumps(daily_all_stocks)
-    daily_gainers_json = json.dumps(daily_gainers)
-    daily_losers_json = json.dumps(daily_losers)
-    weekly_all_stocks_json = json.dumps(weekly_all_stocks)
-    weekly_gainers_json = json.dumps(weekly_gainers)
-    weekly_losers_json = json.dumps(weekly_losers)
-    
-    html = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>S&P 500 Market Movers | Daily & Weekly Performance</title>
-    <meta name="description" content="Daily and weekly S&P 500 top gainers and losers. Track the biggest market movers with downloadable reports.">
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@400;500;600;700&family=Outfit:wght@300;400;500;600;700&display=swap" rel="stylesheet">
-    <style>
-        :root {{
-            --bg-primary: #0a0a0f;
-            --bg-secondary: #12121a;
-            --bg-card: #1a1a24;
-            --bg-hover: #22222e;
-            --text-primary: #f0f0f5;
-            --text-secondary: #8888a0;
-            --text-muted: #5a5a70;
-            --accent-green: #00ff88;
-            --accent-green-dim: #00cc6a;
-            --accent-red: #ff3366;
-            --accent-red-dim: #cc2952;
-            --accent-blue: #00aaff;
-            --accent-purple: #aa66ff;
-            --border-color: #2a2a3a;
-            --glow-green: 0 0 20px rgba(0, 255, 136, 0.3);
-            --glow-red: 0 0 20px rgba(255, 51, 102, 0.3);
-        }}
-
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-
-        body {{
-            font-family: 'Outfit', sans-serif;
-            background: var(--bg-primary);
-            color: var(--text-primary);
-            min-height: 100vh;
-            line-height: 1.6;
-        }}
-
-        /* Animated background */
-        .bg-pattern {{
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            z-index: -1;
-            background: 
-                radial-gradient(ellipse at 20% 20%, rgba(0, 255, 136, 0.05) 0%, transparent 50%),
-                radial-gradient(ellipse at 80% 80%, rgba(255, 51, 102, 0.05) 0%, transparent 50%),
-                radial-gradient(ellipse at 50% 50%, rgba(0, 170, 255, 0.03) 0%, transparent 70%);
-        }}
-
-        .container {{
-            max-width: 1400px;
-            margin: 0 auto;
-            padding: 2rem;
-        }}
-
-        /* Header */
-        header {{
-            text-align: center;
-            padding: 3rem 0;
-            position: relative;
-        }}
-
-        .logo {{
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            gap: 1rem;
-            margin-bottom: 1rem;
-        }}
-
-        .logo-icon {{
-            font-size: 3rem;
-            animation: pulse 2s ease-in-out infinite;
-        }}
-
-        @keyframes pulse {{
-            0%, 100% {{ transform: scale(1); }}
-            50% {{ transform: scale(1.1); }}
-        }}
-
-        h1 {{
-            font-size: clamp(2rem, 5vw, 3.5rem);
-            font-weight: 700;
-            background: linear-gradient(135deg, var(--text-primary) 0%, var(--accent-blue) 50%, var(--accent-purple) 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-            margin-bottom: 0.5rem;
-        }}
-
-        .subtitle {{
-            color: var(--text-secondary);
-            font-size: 1.1rem;
-            font-weight: 300;
-        }}
-
-        .update-time {{
-            display: inline-flex;
-            align-items: center;
-            gap: 0.5rem;
-            margin-top: 1rem;
-            padding: 0.5rem 1rem;
-            background: var(--bg-card);
-            border: 1px solid var(--border-color);
-            border-radius: 100px;
-            font-family: 'JetBrains Mono', monospace;
-            font-size: 0.85rem;
-            color: var(--text-secondary);
-        }}
-
-        .live-dot {{
-            width: 8px;
-            height: 8px;
-            background: var(--accent-green);
-            border-radius: 50%;
-            animation: blink 1.5s ease-in-out infinite;
-        }}
-
-        @keyframes blink {{
-            0%, 100% {{ opacity: 1; }}
-            50% {{ opacity: 0.3; }}
-        }}
-
-        /* Tabs */
-        .tabs {{
-            margin-top: 1.25rem;
-            display: flex;
-            justify-content: center;
-        }}
-
-        .tab-group {{
-            display: inline-flex;
-            gap: 0.25rem;
-            padding: 0.25rem;
-            background: var(--bg-card);
-            border: 1px solid var(--border-color);
-            border-radius: 999px;
-        }}
-
-        .tab-btn {{
-            padding: 0.65rem 1.1rem;
-            border-radius: 999px;
-            background: transparent;
-            border: 1px solid transparent;
-            color: var(--text-secondary);
-            font-family: 'Outfit', sans-serif;
-            font-size: 0.95rem;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }}
-
-        .tab-btn:hover {{
-            background: var(--bg-hover);
-            color: var(--text-primary);
-        }}
-
-        .tab-btn.active {{
-            background: linear-gradient(135deg, var(--accent-blue), var(--accent-purple));
-            color: var(--text-primary);
-            box-shadow: 0 8px 30px rgba(0, 170, 255, 0.2);
-        }}
-
-        .hidden {{
-            display: none !important;
-        }}
-
-        /* Market Summary */
-        .market-summary {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 1rem;
-            margin: 2rem 0;
-        }}
-
-        .summary-card {{
-            background: var(--bg-card);
-            border: 1px solid var(--border-color);
-            border-radius: 16px;
-            padding: 1.5rem;
-            text-align: center;
-            transition: all 0.3s ease;
-        }}
-
-        .summary-card:hover {{
-            transform: translateY(-2px);
-            border-color: var(--accent-blue);
-        }}
-
-        .summary-card.gainers {{
-            border-top: 3px solid var(--accent-green);
-        }}
-
-        .summary-card.losers {{
-            border-top: 3px solid var(--accent-red);
-        }}
-
-        .summary-card.neutral {{
-            border-top: 3px solid var(--accent-blue);
-        }}
-
-        .summary-value {{
-            font-size: 2.5rem;
-            font-weight: 700;
-            font-family: 'JetBrains Mono', monospace;
-        }}
-
-        .summary-card.gainers .summary-value {{
-            color: var(--accent-green);
-        }}
-
-        .summary-card.losers .summary-value {{
-            color: var(--accent-red);
-        }}
-
-        .summary-card.neutral .summary-value {{
-            color: var(--accent-blue);
-        }}
-
-        .summary-label {{
-            color: var(--text-secondary);
-            font-size: 0.9rem;
-            margin-top: 0.5rem;
-        }}
-
-        /* Download Section */
-        .download-section {{
-            display: flex;
-            flex-wrap: wrap;
-            gap: 1rem;
-            justify-content: center;
-            margin: 2rem 0;
-        }}
-
-        .download-btn {{
-            display: inline-flex;
-            align-items: center;
-            gap: 0.75rem;
-            padding: 0.875rem 1.5rem;
-            background: var(--bg-card);
-            border: 1px solid var(--border-color);
-            border-radius: 12px;
-            color: var(--text-primary);
-            font-family: 'Outfit', sans-serif;
-            font-size: 0.95rem;
-            font-weight: 500;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            text-decoration: none;
-        }}
-
-        .download-btn:hover {{
-            background: var(--bg-hover);
-            border-color: var(--accent-blue);
-            transform: translateY(-2px);
-        }}
-
-        .download-btn.primary {{
-            background: linear-gradient(135deg, var(--accent-blue), var(--accent-purple));
-            border: none;
-        }}
-
-        .download-btn.primary:hover {{
-            box-shadow: 0 8px 30px rgba(0, 170, 255, 0.3);
-        }}
-
-        .download-btn svg {{
-            width: 20px;
-            height: 20px;
-        }}
-
-        /* Tables Section */
-        .tables-container {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(min(100%, 600px), 1fr));
-            gap: 2rem;
-            margin-top: 2rem;
-        }}
-
-        .table-card {{
-            background: var(--bg-card);
-            border: 1px solid var(--border-color);
-            border-radius: 20px;
-            overflow: hidden;
-        }}
-
-        .table-header {{
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-            padding: 1.5rem;
-            border-bottom: 1px solid var(--border-color);
-        }}
-
-        .table-title {{
-            display: flex;
-            align-items: center;
-            gap: 0.75rem;
-            font-size: 1.25rem;
-            font-weight: 600;
-        }}
-
-        .table-title.gainers {{
-            color: var(--accent-green);
-        }}
-
-        .table-title.losers {{
-            color: var(--accent-red);
-        }}
-
-        .table-icon {{
-            font-size: 1.5rem;
-        }}
-
-        .table-wrapper {{
-            overflow-x: auto;
-        }}
-
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            font-family: 'JetBrains Mono', monospace;
-            font-size: 0.9rem;
-        }}
-
-        th {{
-            background: var(--bg-secondary);
-            color: var(--text-secondary);
-            font-weight: 500;
-            text-transform: uppercase;
-            font-size: 0.75rem;
-            letter-spacing: 0.05em;
-            padding: 1rem;
-            text-align: left;
-            position: sticky;
-            top: 0;
-        }}
-
-        th:first-child {{
-            text-align: center;
-        }}
-
-        td {{
-            padding: 1rem;
-            border-bottom: 1px solid var(--border-color);
-            transition: background 0.2s ease;
-        }}
-
-        tr:hover td {{
-            background: var(--bg-hover);
-        }}
-
-        tr:last-child td {{
-            border-bottom: none;
-        }}
-
-        .clickable-row {{
-            cursor: pointer;
-        }}
-
-        .clickable-row:focus-visible td {{
-            background: var(--bg-hover);
-            box-shadow: inset 0 0 0 1px rgba(0, 170, 255, 0.6);
-        }}
-
-        .rank {{
-            text-align: center;
-            color: var(--text-muted);
-            font-weight: 500;
-        }}
-
-        .symbol {{
-            font-weight: 600;
-            color: var(--text-primary);
-        }}
-
-        .price {{
-            color: var(--text-secondary);
-        }}
-
-        .change, .change-pct {{
-            font-weight: 600;
-        }}
-
-        .positive {{
-            color: var(--accent-green);
-        }}
-
-        .negative {{
-            color: var(--accent-red);
-        }}
-
-        .volume {{
-            color: var(--text-muted);
-            font-size: 0.85rem;
-        }}
-
-        /* Search and Filter */
-        .controls {{
-            display: flex;
-            flex-wrap: wrap;
-            gap: 1rem;
-            margin: 2rem 0;
-            justify-content: center;
-        }}
-
-        .search-box {{
-            position: relative;
-            flex: 1;
-            max-width: 400px;
-        }}
-
-        .search-box input {{
-            width: 100%;
-            padding: 1rem 1rem 1rem 3rem;
-            background: var(--bg-card);
-            border: 1px solid var(--border-color);
-            border-radius: 12px;
-            color: var(--text-primary);
-            font-family: 'Outfit', sans-serif;
-            font-size: 1rem;
-            transition: all 0.3s ease;
-        }}
-
-        .search-box input:focus {{
-            outline: none;
-            border-color: var(--accent-blue);
-            box-shadow: 0 0 0 3px rgba(0, 170, 255, 0.1);
-        }}
-
-        .search-box input::placeholder {{
-            color: var(--text-muted);
-        }}
-
-        .search-box svg {{
-            position: absolute;
-            left: 1rem;
-            top: 50%;
-            transform: translateY(-50%);
-            width: 20px;
-            height: 20px;
-            color: var(--text-muted);
-        }}
-
-        /* Chart Modal */
-        .chart-modal {{
-            position: fixed;
-            inset: 0;
-            background: rgba(10, 10, 15, 0.86);
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            padding: 1.5rem;
-            z-index: 1000;
-        }}
-
-        .chart-panel {{
-            width: min(960px, 100%);
-            background: var(--bg-card);
-            border: 1px solid var(--border-color);
-            border-radius: 20px;
-            box-shadow: 0 20px 60px rgba(0, 0, 0, 0.45);
-            overflow: hidden;
-        }}
-
-        .chart-header {{
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-            padding: 1.25rem 1.5rem;
-            border-bottom: 1px solid var(--border-color);
-        }}
-
-        .chart-title {{
-            font-size: 1.25rem;
-            font-weight: 600;
-        }}
-
-        .chart-subtitle {{
-            color: var(--text-secondary);
-            font-size: 0.9rem;
-        }}
-
-        .chart-close {{
-            width: 36px;
-            height: 36px;
-            border-radius: 10px;
-            border: 1px solid var(--border-color);
-            background: var(--bg-secondary);
-            color: var(--text-primary);
-            cursor: pointer;
-            transition: all 0.2s ease;
-        }}
-
-        .chart-close:hover {{
-            border-color: var(--accent-blue);
-            transform: translateY(-1px);
-        }}
-
-        .chart-controls {{
-            display: flex;
-            flex-wrap: wrap;
-            align-items: center;
-            justify-content: space-between;
-            gap: 1rem;
-            padding: 1rem 1.5rem;
-            background: var(--bg-secondary);
-            border-bottom: 1px solid var(--border-color);
-        }}
-
-        .chart-tabs {{
-            display: inline-flex;
-            flex-wrap: wrap;
-            gap: 0.3rem;
-            padding: 0.25rem;
-            background: var(--bg-card);
-            border: 1px solid var(--border-color);
-            border-radius: 12px;
-        }}
-
-        .chart-tab {{
-            padding: 0.4rem 0.7rem;
-            border-radius: 8px;
-            border: 1px solid transparent;
-            background: transparent;
-            color: var(--text-secondary);
-            font-family: 'JetBrains Mono', monospace;
-            font-size: 0.8rem;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.2s ease;
-        }}
-
-        .chart-tab:hover {{
-            color: var(--text-primary);
-            background: var(--bg-hover);
-        }}
-
-        .chart-tab.active {{
-            background: linear-gradient(135deg, var(--accent-blue), var(--accent-purple));
-            color: var(--text-primary);
-            box-shadow: 0 4px 15px rgba(0, 170, 255, 0.2);
-        }}
-
-        .chart-note {{
-            color: var(--text-muted);
-            font-size: 0.8rem;
-        }}
-
-
-        .chart-body {{
-            position: relative;
-            padding: 1rem 1.5rem 1.5rem;
-        }}
-
-        #chartContainer {{
-            width: 100%;
-            height: 360px;
-        }}
-
-        .chart-state {{
-            position: absolute;
-            inset: 0;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            background: rgba(10, 10, 15, 0.6);
-            color: var(--text-secondary);
-            font-family: 'JetBrains Mono', monospace;
-            font-size: 0.95rem;
-            z-index: 2;
-        }}
-
-        /* Footer */
-        footer {{
-            text-align: center;
-            padding: 3rem 0;
-            margin-top: 3rem;
-            border-top: 1px solid var(--border-color);
-            color: var(--text-muted);
-            font-size: 0.9rem;
-        }}
-
-        footer a {{
-            color: var(--accent-blue);
-            text-decoration: none;
-        }}
-
-        footer a:hover {{
-            text-decoration: underline;
-        }}
-
-        /* Responsive */
-        @media (max-width: 768px) {{
-            .container {{
-                padding: 1rem;
-            }}
-
-            header {{
-                padding: 2rem 0;
-            }}
-
-            .market-summary {{
-                grid-template-columns: repeat(2, 1fr);
-            }}
-
-            .table-header {{
-                flex-direction: column;
-                gap: 1rem;
-                text-align: center;
-            }}
-
-            table {{
-                font-size: 0.8rem;
-            }}
-
-            th, td {{
-                padding: 0.75rem 0.5rem;
-            }}
-
-            .download-section {{
-                flex-direction: column;
-                align-items: stretch;
-            }}
-
-            .chart-controls {{
-                flex-direction: column;
-                align-items: flex-start;
-            }}
-
-            #chartContainer {{
-                height: 280px;
-            }}
-        }}
-
-        /* Animations */
-        .fade-in {{
-            animation: fadeIn 0.6s ease-out forwards;
-            opacity: 0;
-        }}
-
-        @keyframes fadeIn {{
-            to {{ opacity: 1; }}
-        }}
-
-        .slide-up {{
-            animation: slideUp 0.6s ease-out forwards;
-            opacity: 0;
-            transform: translateY(20px);
-        }}
-
-        @keyframes slideUp {{
-            to {{
-                opacity: 1;
-                transform: translateY(0);
-            }}
-        }}
-
-        .delay-1 {{ animation-delay: 0.1s; }}
-        .delay-2 {{ animation-delay: 0.2s; }}
-        .delay-3 {{ animation-delay: 0.3s; }}
-        .delay-4 {{ animation-delay: 0.4s; }}
-    </style>
-</head>
-<body>
-    <div class="bg-pattern"></div>
-    
-    <div class="container">
-        <header class="fade-in">
-            <div class="logo">
-                <span class="logo-icon">📈</span>
-            </div>
-            <h1>S&P 500 Market Movers</h1>
-            <p class="subtitle" id="subtitle">{daily_subtitle}</p>
-            <div class="update-time">
-                <span class="live-dot"></span>
-                <span id="updateText">{daily_update_label}</span>
-            </div>
-            <div class="tabs">
-                <div class="tab-group">
-                    <button id="dailyTab" class="tab-btn active" onclick="switchView('daily')">Daily</button>
-                    <button id="weeklyTab" class="tab-btn" onclick="switchView('weekly')">Weekly (Mon-Fri)</button>
-                </div>
-            </div>
-        </header>
-
-        <section class="market-summary slide-up delay-1" id="dailySummary">
-            <div class="summary-card gainers">
-                <div class="summary-value">{daily_total_gainers}</div>
-                <div class="summary-label">Stocks Up</div>
-            </div>
-            <div class="summary-card losers">
-                <div class="summary-value">{daily_total_losers}</div>
-                <div class="summary-label">Stocks Down</div>
-            </div>
-            <div class="summary-card neutral">
-                <div class="summary-value">{daily_total_unchanged}</div>
-                <div class="summary-label">Unchanged</div>
-            </div>
-            <div class="summary-card {daily_avg_class}">
-                <div class="summary-value">{daily_avg_change:+.2f}%</div>
-                <div class="summary-label">Avg Change</div>
-            </div>
-        </section>
-
-        <section class="market-summary slide-up delay-1 hidden" id="weeklySummary">
-            <div class="summary-card gainers">
-                <div class="summary-value">{weekly_total_gainers}</div>
-                <div class="summary-label">Stocks Up</div>
-            </div>
-            <div class="summary-card losers">
-                <div class="summary-value">{weekly_total_losers}</div>
-                <div class="summary-label">Stocks Down</div>
-            </div>
-            <div class="summary-card neutral">
-                <div class="summary-value">{weekly_total_unchanged}</div>
-                <div class="summary-label">Unchanged</div>
-            </div>
-            <div class="summary-card {weekly_avg_class}">
-                <div class="summary-value">{weekly_avg_change:+.2f}%</div>
-                <div class="summary-label">Avg Change</div>
-            </div>
-        </section>
-
-        <section class="controls slide-up delay-2">
-            <div class="search-box">
-                <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M21 21l-6-6m2-5a7 7 0 11-14 0 7 7 0 0114 0z" />
-                </svg>
-                <input type="text" id="searchInput" placeholder="Search by symbol (e.g., AAPL, MSFT)..." oninput="filterTables()">
-            </div>
-        </section>
-
-        <section class="download-section slide-up delay-2" id="dailyDownloads">
-            <a href="data/daily/gainers.csv" download class="download-btn primary">
-                <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M4 16v1a3 3 0 003 3h10a3 3 0 003-3v-1m-4-4l-4 4m0 0l-4-4m4 4V4" />
-                </svg>
-                Download Gainers (CSV)
-            </a>
-            <a href="data/daily/losers.csv" download class="download-btn primary">
-                <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M4 16v1a3 3 0 003 3h10a3 3 0 003-3v-1m-4-4l-4 4m0 0l-4-4m4 4V4" />
-                </svg>
-                Download Losers (CSV)
-            </a>
-            <a href="data/daily/all_stocks.csv" download class="download-btn">
-                <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M9 17v-2m3 2v-4m3 4v-6m2 10H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
-                </svg>
-                Download All S&P 500 (CSV)
-            </a>
-            <button onclick="copyTableData(event, 'daily')" class="download-btn">
-                <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M8 16H6a2 2 0 01-2-2V6a2 2 0 012-2h8a2 2 0 012 2v2m-6 12h8a2 2 0 002-2v-8a2 2 0 00-2-2h-8a2 2 0 00-2 2v8a2 2 0 002 2z" />
-                </svg>
-                Copy to Clipboard
-            </button>
-        </section>
-
-        <section class="download-section slide-up delay-2 hidden" id="weeklyDownloads">
-            <a href="data/weekly/gainers.csv" download class="download-btn primary">
-                <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M4 16v1a3 3 0 003 3h10a3 3 0 003-3v-1m-4-4l-4 4m0 0l-4-4m4 4V4" />
-                </svg>
-                Download Weekly Gainers (CSV)
-            </a>
-            <a href="data/weekly/losers.csv" download class="download-btn primary">
-                <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M4 16v1a3 3 0 003 3h10a3 3 0 003-3v-1m-4-4l-4 4m0 0l-4-4m4 4V4" />
-                </svg>
-                Download Weekly Losers (CSV)
-            </a>
-            <a href="data/weekly/all_stocks.csv" download class="download-btn">
-                <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M9 17v-2m3 2v-4m3 4v-6m2 10H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
-                </svg>
-                Download Weekly All S&P 500 (CSV)
-            </a>
-            <button onclick="copyTableData(event, 'weekly')" class="download-btn">
-                <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M8 16H6a2 2 0 01-2-2V6a2 2 0 012-2h8a2 2 0 012 2v2m-6 12h8a2 2 0 002-2v-8a2 2 0 00-2-2h-8a2 2 0 00-2 2v8a2 2 0 002 2z" />
-                </svg>
-                Copy to Clipboard
-            </button>
-        </section>
-
-        <div class="tables-container" id="dailyTables">
-            <div class="table-card slide-up delay-3">
-                <div class="table-header">
-                    <h2 class="table-title gainers">
-                        <span class="table-icon">🟢</span>
-                        Top 20 Gainers
-                    </h2>
-                </div>
-                <div class="table-wrapper">
-                    <table id="dailyGainersTable">
-                        <thead>
-                            <tr>
-                                <th>#</th>
-                                <th>Symbol</th>
-                                <th>Price</th>
-                                <th>Change</th>
-                                <th>Change %</th>
-                                <th>Volume</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {daily_gainers_rows}
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-
-            <div class="table-card slide-up delay-4">
-                <div class="table-header">
-                    <h2 class="table-title losers">
-                        <span class="table-icon">🔴</span>
-                        Top 20 Losers
-                    </h2>
-                </div>
-                <div class="table-wrapper">
-                    <table id="dailyLosersTable">
-                        <thead>
-                            <tr>
-                                <th>#</th>
-                                <th>Symbol</th>
-                                <th>Price</th>
-                                <th>Change</th>
-                                <th>Change %</th>
-                                <th>Volume</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {daily_losers_rows}
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-        </div>
-
-        <div class="tables-container hidden" id="weeklyTables">
-            <div class="table-card slide-up delay-3">
-                <div class="table-header">
-                    <h2 class="table-title gainers">
-                        <span class="table-icon">🟢</span>
-                        Top 20 Weekly Gainers
-                    </h2>
-                </div>
-                <div class="table-wrapper">
-                    <table id="weeklyGainersTable">
-                        <thead>
-                            <tr>
-                                <th>#</th>
-                                <th>Symbol</th>
-                                <th>Week Start</th>
-                                <th>Week End</th>
-                                <th>Change</th>
-                                <th>Change %</th>
-                                <th>Avg Volume</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {weekly_gainers_rows}
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-
-            <div class="table-card slide-up delay-4">
-                <div class="table-header">
-                    <h2 class="table-title losers">
-                        <span class="table-icon">🔴</span>
-                        Top 20 Weekly Losers
-                    </h2>
-                </div>
-                <div class="table-wrapper">
-                    <table id="weeklyLosersTable">
-                        <thead>
-                            <tr>
-                                <th>#</th>
-                                <th>Symbol</th>
-                                <th>Week Start</th>
-                                <th>Week End</th>
-                                <th>Change</th>
-                                <th>Change %</th>
-                                <th>Avg Volume</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {weekly_losers_rows}
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-        </div>
-
-        <footer>
-            <p>Data source: Yahoo Finance | S&P 500 Index</p>
-            <p style="margin-top: 0.5rem;">Auto-updated after market close (Mon–Fri) + weekly refresh (Sat)</p>
-            <p style="margin-top: 1rem;">
-                <a href="https://github.com/Adarsh1999/market-movers" target="_blank">View on GitHub</a>
-            </p>
-        </footer>
-    </div>
-
-    <div class="chart-modal hidden" id="chartModal">
-        <div class="chart-panel">
-            <div class="chart-header">
-                <div>
-                    <div class="chart-title" id="chartTitle">Chart</div>
-                    <div class="chart-subtitle" id="chartSubtitle">Candlestick view</div>
-                </div>
-                <button class="chart-close" id="chartClose" aria-label="Close chart">X</button>
-            </div>
-            <div class="chart-controls">
-                <div class="chart-tabs">
-                    <button class="chart-tab" data-range="m15">15M</button>
-                    <button class="chart-tab" data-range="h1">1H</button>
-                    <button class="chart-tab" data-range="h2">2H</button>
-                    <button class="chart-tab" data-range="h3">3H</button>
-                    <button class="chart-tab active" data-range="day">1D</button>
-                    <button class="chart-tab" data-range="week">1W</button>
-                    <button class="chart-tab" data-range="month">1M</button>
-                </div>
-                <div class="chart-note">Intraday (15M-3H) • Daily • Weekly • Monthly candlestick views</div>
-            </div>
-
-            <div class="chart-body">
-                <div id="chartContainer"></div>
-                <div class="chart-state hidden" id="chartState">Loading chart...</div>
-            </div>
-        </div>
-    </div>
-
-    <script src="https://unpkg.com/lightweight-charts@3.8.0/dist/lightweight-charts.standalone.production.js"></script>
-    <script>
-        // Store data for filtering and export
-        const dailyAllStocks = {daily_all_stocks_json};
-        const dailyGainers = {daily_gainers_json};
-        const dailyLosers = {daily_losers_json};
-
-        const weeklyAllStocks = {weekly_all_stocks_json};
-        const weeklyGainers = {weekly_gainers_json};
-        const weeklyLosers = {weekly_losers_json};
-
-        const DAILY_SUBTITLE = "{daily_subtitle}";
-        const WEEKLY_SUBTITLE = "{weekly_subtitle}";
-        const DAILY_UPDATE_TEXT = "{daily_update_label}";
-        const WEEKLY_UPDATE_TEXT = "{weekly_update_label}";
-        const DEFAULT_VIEW = "{default_view}";
-        const chartCache = {{}};
-
-        const chartModal = document.getElementById('chartModal');
-        const chartTitle = document.getElementById('chartTitle');
-        const chartSubtitle = document.getElementById('chartSubtitle');
-        const chartState = document.getElementById('chartState');
-        const chartContainer = document.getElementById('chartContainer');
-        const chartTabs = Array.from(document.querySelectorAll('.chart-tab'));
-        const chartClose = document.getElementById('chartClose');
-
-        let chartInstance = null;
-        let candleSeries = null;
-        let activeChartTicker = null;
-        let activeChartRange = 'day';
-
-        function switchView(view) {{
-            const isWeekly = view === 'weekly';
-
-            document.getElementById('dailySummary').classList.toggle('hidden', isWeekly);
-            document.getElementById('weeklySummary').classList.toggle('hidden', !isWeekly);
-            document.getElementById('dailyDownloads').classList.toggle('hidden', isWeekly);
-            document.getElementById('weeklyDownloads').classList.toggle('hidden', !isWeekly);
-            document.getElementById('dailyTables').classList.toggle('hidden', isWeekly);
-            document.getElementById('weeklyTables').classList.toggle('hidden', !isWeekly);
-
-            document.getElementById('dailyTab').classList.toggle('active', !isWeekly);
-            document.getElementById('weeklyTab').classList.toggle('active', isWeekly);
-
-            document.getElementById('subtitle').textContent = isWeekly ? WEEKLY_SUBTITLE : DAILY_SUBTITLE;
-            document.getElementById('updateText').textContent = isWeekly ? WEEKLY_UPDATE_TEXT : DAILY_UPDATE_TEXT;
-
-            filterTables();
-        }}
-
-        function setChartState(message) {{
-            chartState.textContent = message;
-            chartState.classList.remove('hidden');
-        }}
-
-        function clearChartState() {{
-            chartState.classList.add('hidden');
-        }}
-
-        function ensureChart() {{
-            if (typeof LightweightCharts === 'undefined') {{
-                setChartState('Chart library unavailable.');
-                return false;
-            }}
-
-            try {{
-                if (!chartInstance) {{
-                    // Use fallback dimensions if container not yet laid out
-                    const width = chartContainer.clientWidth || 800;
-                    const height = chartContainer.clientHeight || 360;
-
-                    chartInstance = LightweightCharts.createChart(chartContainer, {{
-                        layout: {{
-                            background: {{ type: 'solid', color: 'transparent' }},
-                            textColor: '#cfd3dc',
-                            fontFamily: 'JetBrains Mono, monospace',
-                        }},
-                        grid: {{
-                            vertLines: {{ color: 'rgba(255, 255, 255, 0.06)' }},
-                            horzLines: {{ color: 'rgba(255, 255, 255, 0.06)' }},
-                        }},
-                        rightPriceScale: {{ borderVisible: false }},
-                        timeScale: {{ borderVisible: false }},
-                        width: width,
-                        height: height,
-                    }});
-
-                    candleSeries = chartInstance.addCandlestickSeries({{
-                        upColor: '#00ff88',
-                        downColor: '#ff3366',
-                        borderUpColor: '#00cc6a',
-                        borderDownColor: '#cc2952',
-                        wickUpColor: '#00cc6a',
-                        wickDownColor: '#cc2952',
-                    }});
-                }} else {{
-                    // Update dimensions for existing chart
-                    const width = chartContainer.clientWidth || 800;
-                    const height = chartContainer.clientHeight || 360;
-                    chartInstance.applyOptions({{ width: width, height: height }});
-                }}
-
-                return true;
-            }} catch (e) {{
-                console.error('Chart creation error:', e);
-                setChartState('Chart initialization failed.');
-                return false;
-            }}
-        }}
-
-        function normalizeChartData(series) {{
-            const sanitized = [];
-            series.forEach(bar => {{
-                if (!bar) {{
-                    return;
-                }}
-
-                let timeValue = bar.time;
-                if (typeof timeValue === 'string') {{
-                    const parts = timeValue.split('-').map(Number);
-                    timeValue = Date.UTC(parts[0], parts[1] - 1, parts[2]) / 1000;
-                }}
-
-                const open = Number(bar.open);
-                const high = Number(bar.high);
-                const low = Number(bar.low);
-                const close = Number(bar.close);
-
-                if (!Number.isFinite(timeValue) || !Number.isFinite(open) || !Number.isFinite(high) || !Number.isFinite(low) || !Number.isFinite(close)) {{
-                    return;
-                }}
-
-                const maxBody = Math.max(open, close);
-                const minBody = Math.min(open, close);
-                const fixedHigh = Math.max(high, maxBody);
-                const fixedLow = Math.min(low, minBody);
-
-                sanitized.push({{
-                    time: timeValue,
-                    open,
-                    high: fixedHigh,
-                    low: fixedLow,
-                    close,
-                }});
-            }});
-
-            sanitized.sort((a, b) => a.time - b.time);
-            const deduped = [];
-            let lastTime = null;
-            sanitized.forEach(bar => {{
-                if (bar.time === lastTime) {{
-                    deduped[deduped.length - 1] = bar;
-                    return;
-                }}
-                deduped.push(bar);
-                lastTime = bar.time;
-            }});
-
-            return deduped;
-        }}
-
-        function renderChartData(payload, range) {{
-            if (!candleSeries || !chartInstance) {{
-                console.error('Chart not initialized');
-                setChartState('Chart not initialized.');
-                return;
-            }}
-
-            const series = payload && payload[range] ? payload[range] : [];
-            console.log(`Rendering ${{range}} data: ${{series.length}} candles`);
-
-            if (!series.length) {{
-                setChartState('No ' + range + ' data available.');
-                candleSeries.setData([]);
-                return;
-            }}
-
-            clearChartState();
-            const normalized = normalizeChartData(series);
-            console.log(`Normalized data: ${{normalized.length}} candles`);
-
-            if (!normalized.length) {{
-                setChartState('No valid chart data after normalization.');
-                candleSeries.setData([]);
-                return;
-            }}
-
-            candleSeries.setData(normalized);
-            chartInstance.timeScale().fitContent();
-        }}
-
-        function loadChartData(ticker) {{
-            if (chartCache[ticker]) {{
-                return Promise.resolve(chartCache[ticker]);
-            }}
-
-            setChartState('Loading chart data...');
-            return fetch(`data/charts/${{encodeURIComponent(ticker)}}.json`)
-                .then(response => {{
-                    if (!response.ok) {{
-                        throw new Error('Chart not found');
-                    }}
-                    return response.json();
-                }})
-                .then(payload => {{
-                    chartCache[ticker] = payload;
-                    return payload;
-                }});
-        }}
-
-        function getTimeframeLabel(range) {{
-            const labels = {{
-                'm15': '15-Minute Candles',
-                'h1': '1-Hour Candles',
-                'h2': '2-Hour Candles',
-                'h3': '3-Hour Candles',
-                'day': 'Daily Candles',
-                'week': 'Weekly Candles',
-                'month': 'Monthly Candles'
-            }};
-            return labels[range] || 'Candlestick Chart';
-        }}
-
-        function setActiveChartRange(range) {{
-            activeChartRange = range;
-            chartTabs.forEach(tab => {{
-                tab.classList.toggle('active', tab.dataset.range === range);
-            }});
-
-            // Update subtitle based on selected timeframe
-            chartSubtitle.textContent = getTimeframeLabel(range);
-
-            if (activeChartTicker && chartCache[activeChartTicker]) {{
-                renderChartData(chartCache[activeChartTicker], activeChartRange);
-            }}
-        }}
-
-
-        function openChart(ticker) {{
-            activeChartTicker = ticker;
-            chartTitle.textContent = `${{ticker}} Candlesticks`;
-            chartSubtitle.textContent = getTimeframeLabel(activeChartRange);
-            chartModal.classList.remove('hidden');
-            setChartState('Loading chart...');
-
-
-            // Use requestAnimationFrame to ensure DOM is laid out before creating chart
-            requestAnimationFrame(() => {{
-                if (!ensureChart()) {{
-                    return;
-                }}
-                setActiveChartRange(activeChartRange);
-                loadChartData(ticker)
-                    .then(payload => {{
-                        try {{
-                            renderChartData(payload, activeChartRange);
-                        }} catch (renderErr) {{
-                            console.error('Chart render error:', renderErr);
-                            setChartState('Chart render failed: ' + renderErr.message);
-                        }}
-                    }})
-                    .catch(error => {{
-                        console.error('Chart load error:', error);
-                        setChartState('Chart data unavailable: ' + error.message);
-                    }});
-            }});
-        }}
-
-        function closeChart() {{
-            chartModal.classList.add('hidden');
-        }}
-
-        function bindChartRows() {{
-            const rows = document.querySelectorAll('.clickable-row');
-            rows.forEach(row => {{
-                const ticker = row.dataset.ticker;
-                if (!ticker) {{
-                    return;
-                }}
-                row.addEventListener('click', () => openChart(ticker));
-                row.addEventListener('keydown', event => {{
-                    if (event.key === 'Enter' || event.key === ' ') {{
-                        event.preventDefault();
-                        openChart(ticker);
-                    }}
-                }});
-            }});
-        }}
-
-        function filterTables() {{
-            const searchTerm = document.getElementById('searchInput').value.toUpperCase();
-            const tableIds = ['dailyGainersTable', 'dailyLosersTable', 'weeklyGainersTable', 'weeklyLosersTable'];
-
-            tableIds.forEach(id => {{
-                const rows = document.querySelectorAll('#' + id + ' tbody tr');
-                rows.forEach(row => {{
-                    const symbolEl = row.querySelector('.symbol');
-                    const symbol = symbolEl ? symbolEl.textContent.toUpperCase() : '';
-                    row.style.display = symbol.includes(searchTerm) ? '' : 'none';
-                }});
-            }});
-        }}
-
-        function copyTableData(evt, view) {{
-            const isWeekly = view === 'weekly';
-            const gainers = isWeekly ? weeklyGainers : dailyGainers;
-            const losers = isWeekly ? weeklyLosers : dailyLosers;
-            const updateText = isWeekly ? WEEKLY_UPDATE_TEXT : DAILY_UPDATE_TEXT;
-
-            let text = 'S&P 500 Market Movers - ' + (isWeekly ? 'WEEKLY (MON-FRI)' : 'DAILY') + '\\n';
-            text += updateText + '\\n\\n';
-
-            if (!isWeekly) {{
-                text += 'TOP GAINERS\\n';
-                text += 'Symbol\\tPrice\\tChange\\tChange%\\tVolume\\n';
-                gainers.forEach(s => {{
-                    text += s.ticker + '\\t$' + s.price + '\\t' + (s.change >= 0 ? '+' : '') + '$' + s.change + '\\t' + (s.change_pct >= 0 ? '+' : '') + s.change_pct + '%\\t' + (s.volume || 0).toLocaleString() + '\\n';
-                }});
-
-                text += '\\nTOP LOSERS\\n';
-                text += 'Symbol\\tPrice\\tChange\\tChange%\\tVolume\\n';
-                losers.forEach(s => {{
-                    text += s.ticker + '\\t$' + s.price + '\\t$' + s.change + '\\t' + s.change_pct + '%\\t' + (s.volume || 0).toLocaleString() + '\\n';
-                }});
-            }} else {{
-                text += 'TOP WEEKLY GAINERS\\n';
-                text += 'Symbol\\tWeekStart\\tWeekEnd\\tChange\\tChange%\\tAvgVol\\n';
-                gainers.forEach(s => {{
-                    text += s.ticker + '\\t$' + s.start_price + '\\t$' + s.end_price + '\\t' + (s.change >= 0 ? '+' : '') + '$' + s.change + '\\t' + (s.change_pct >= 0 ? '+' : '') + s.change_pct + '%\\t' + (s.avg_volume || 0).toLocaleString() + '\\n';
-                }});
-
-                text += '\\nTOP WEEKLY LOSERS\\n';
-                text += 'Symbol\\tWeekStart\\tWeekEnd\\tChange\\tChange%\\tAvgVol\\n';
-                losers.forEach(s => {{
-                    text += s.ticker + '\\t$' + s.start_price + '\\t$' + s.end_price + '\\t$' + s.change + '\\t' + s.change_pct + '%\\t' + (s.avg_volume || 0).toLocaleString() + '\\n';
-                }});
-            }}
-
-            navigator.clipboard.writeText(text).then(() => {{
-                const btn = evt.currentTarget;
-                const originalText = btn.innerHTML;
-                btn.innerHTML = '<svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke="currentColor" style="width:20px;height:20px"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M5 13l4 4L19 7" /></svg> Copied!';
-                setTimeout(() => {{ btn.innerHTML = originalText; }}, 2000);
-            }});
-        }}
-
-        // Default view: daily on weekdays, weekly on weekends (when available)
-        document.addEventListener('DOMContentLoaded', () => {{
-            switchView(DEFAULT_VIEW === 'weekly' ? 'weekly' : 'daily');
-            bindChartRows();
-        }});
-
-        chartTabs.forEach(tab => {{
-            tab.addEventListener('click', () => {{
-                setActiveChartRange(tab.dataset.range);
-            }});
-        }});
-
-        chartClose.addEventListener('click', closeChart);
-
-        chartModal.addEventListener('click', event => {{
-            if (event.target === chartModal) {{
-                closeChart();
-            }}
-        }});
-
-        document.addEventListener('keydown', event => {{
-            if (event.key === 'Escape' && !chartModal.classList.contains('hidden')) {{
-                closeChart();
-            }}
-        }});
-
-        window.addEventListener('resize', () => {{
-            if (chartInstance) {{
-                chartInstance.applyOptions({{
-                    width: chartContainer.clientWidth,
-                    height: chartContainer.clientHeight,
-                }});
-            }}
-        }});
-    </script>
-</body>
-</html>'''
-    
-    return html
+    assets = static_assets()
+    values = dict(
+        style_href=assets["style.css"][0],
+        app_src=assets["app.js"][0],
+        universe_label=html.escape(universe_label),
+        daily_subtitle=daily_subtitle,
+        daily_update_label=daily_update_label,
+        daily_total_gainers=str(daily_total_gainers),
+        daily_total_losers=str(daily_total_losers),
+        daily_total_unchanged=str(daily_total_unchanged),
+        daily_avg_class=daily_avg_class,
+        daily_avg_change=f"{daily_avg_change:+.2f}",
+        weekly_total_gainers=str(weekly_total_gainers),
+        weekly_total_losers=str(weekly_total_losers),
+        weekly_total_unchanged=str(weekly_total_unchanged),
+        weekly_avg_class=weekly_avg_class,
+        weekly_avg_change=f"{weekly_avg_change:+.2f}",
+        daily_gainers_rows=daily_gainers_rows,
+        daily_losers_rows=daily_losers_rows,
+        weekly_gainers_rows=weekly_gainers_rows,
+        weekly_losers_rows=weekly_losers_rows,
+        dataset_urls_json=script_json(dataset_urls),
+        movers_json=script_json(movers),
+        universe_label_json=script_json(universe_label),
+        daily_subtitle_json=script_json(daily_subtitle),
+        weekly_subtitle_json=script_json(weekly_subtitle),
+        daily_update_label_json=script_json(daily_update_label),
+        weekly_update_label_json=script_json(weekly_update_label),
+        default_view_json=script_json(default_view),
+        chart_bundle_json=script_json(chart_bundle),
+        chart_index_url_json=script_json(chart_index_url or f"data/charts/{CHART_BUNDLE_INDEX_FILE}"),
+    )
+
+    for literal, name in _template_parts("index.html"):
+        out.write(literal)
+        if name is not None:
+            value = values[name]
+            if isinstance(value, str):
+                out.write(value)
+            else:
+                out.writelines(value)
+
+
+def generate_html(*args, **kwargs) -> str:
+    """Generate the main HTML page as a string (see stream_html)."""
+    buf = io.StringIO()
+    stream_html(buf, *args, **kwargs)
+    return buf.getvalue()
 
 
 def main():
@@ -1954,6 +2162,10 @@ def main():
     print("=" * 60)
     print("🚀 S&P 500 Market Movers - Static Site Generator")
     print("=" * 60)
+
+    universe = load_universe(UNIVERSE)
+    universe_label = universe["label"]
+    universe_tickers = universe["tickers"]
     
     # Create output directory
     os.makedirs('dist', exist_ok=True)
@@ -1961,38 +2173,62 @@ def main():
     os.makedirs('dist/data/daily', exist_ok=True)
     os.makedirs('dist/data/weekly', exist_ok=True)
     os.makedirs('dist/data/charts', exist_ok=True)
+    os.makedirs('dist/data/returns', exist_ok=True)
+
+    manifest = load_build_manifest("dist")
+    metrics = new_build_metrics()
+    counters = metrics["counters"]
+    DOWNLOAD_LOG.clear()
 
     # Use US/Eastern for display (market context)
     eastern = ZoneInfo("America/New_York")
-    generated_at_et = datetime.now(timezone.utc).astimezone(eastern)
+    generated_at_et = build_clock().astimezone(eastern)
     
-    # Download data once (enough for weekly + daily)
-    print("\n📊 Downloading S&P 500 market data...")
-    data = download_sp500_history(period="10d")
+    # Download data once (enough for weekly + daily, and optionally the chart lookback)
+    print(f"\n📊 Downloading {universe_label} market data ({universe['name']})...")
+    with build_stage(metrics, "download"):
+        history = download_sp500_history(period=HISTORY_PERIOD, tickers=universe_tickers)
+        data = history.iloc[-DATASET_SESSIONS:]
+    counters["universe_tickers"] = len(universe_tickers)
+    counters["tickers_with_data"] = len(_tickers_with_data(history, universe_tickers))
 
     # Build DAILY dataset
     print("\n📅 Building DAILY dataset...")
-    daily_all_stocks, daily_meta = build_daily_dataset(data)
-    if not daily_all_stocks:
-        raise ValueError("No DAILY stock data retrieved")
-
-    daily_gainers, daily_losers = get_top_movers(daily_all_stocks, limit=20)
-    daily_sorted_all = sorted(daily_all_stocks, key=lambda x: x["change_pct"], reverse=True)
-    print(f"   Daily: {len(daily_gainers)} gainers, {len(daily_losers)} losers")
+    with build_stage(metrics, "daily_dataset"):
+        daily_all_stocks, daily_meta = build_daily_dataset(data, tickers=universe_tickers)
+        if not daily_all_stocks:
+            raise ValueError("No DAILY stock data retrieved")
+
+        daily_ranking = rank_stocks(daily_all_stocks, limit=20)
+        daily_gainers, daily_losers = daily_ranking["gainers"], daily_ranking["losers"]
+        daily_sorted_all = daily_ranking["all"]
+        print(f"   Daily: {len(daily_gainers)} gainers, {len(daily_losers)} losers")
+    counters["daily_stocks"] = len(daily_all_stocks)
+    counters["daily_skipped"] = len(universe_tickers) - len(daily_all_stocks)
 
     # Build WEEKLY dataset (completed Mon-Fri range)
     weekly_start_date, weekly_end_date = get_week_date_range(generated_at_et)
     print(f"\n🗓️  Building WEEKLY (Mon-Fri) dataset... ({weekly_start_date} to {weekly_end_date})")
-    weekly_all_stocks, weekly_meta = build_weekly_dataset(
-        data,
-        start_date=weekly_start_date,
-        end_date=weekly_end_date,
-    )
-    weekly_gainers, weekly_losers = get_top_movers(weekly_all_stocks, limit=20) if weekly_all_stocks else ([], [])
-    weekly_sorted_all = (
-        sorted(weekly_all_stocks, key=lambda x: x["change_pct"], reverse=True) if weekly_all_stocks else []
-    )
-    print(f"   Weekly: {len(weekly_gainers)} gainers, {len(weekly_losers)} losers")
+    with build_stage(metrics, "weekly_dataset"):
+        weekly_all_stocks, weekly_meta = build_weekly_dataset(
+            data,
+            start_date=weekly_start_date,
+            end_date=weekly_end_date,
+            tickers=universe_tickers,
+        )
+        weekly_ranking = rank_stocks(weekly_all_stocks, limit=20)
+        weekly_gainers, weekly_losers = weekly_ranking["gainers"], weekly_ranking["losers"]
+        weekly_sorted_all = weekly_ranking["all"]
+        print(f"   Weekly: {len(weekly_gainers)} gainers, {len(weekly_losers)} losers")
+    counters["weekly_stocks"] = len(weekly_all_stocks)
+    counters["weekly_skipped"] = len(universe_tickers) - len(weekly_all_stocks)
+
+    # Build multi-window returns (1D ... 52W) from the full history
+    print("\n📆 Building multi-window returns...")
+    with build_stage(metrics, "returns_dataset"):
+        returns_windows = build_returns_dataset(history, tickers=universe_tickers)
+    counters["returns_windows"] = len(returns_windows)
+    counters["returns_windows_missing"] = [name for name in RETURN_WINDOWS if name not in returns_windows]
 
     # Build chart data for top movers
     chart_tickers = sorted(
@@ -2002,77 +2238,201 @@ def main():
         }
     )
     
-    # Download daily chart history
-    chart_history = download_chart_history(chart_tickers, period=CHART_PERIOD)
-    
-    # Download intraday data for charts
-    print("\n📈 Downloading intraday chart data...")
-    intraday_15m = download_intraday_15m(chart_tickers)
-    intraday_1h = download_intraday_1h(chart_tickers)
-    
+    # Download daily + intraday chart history concurrently
+    print("\n📈 Downloading chart data (daily, 15m, 1h)...")
+    with build_stage(metrics, "chart_download"):
+        chart_data = download_chart_data(chart_tickers, daily=history if CHART_FROM_UNIVERSE else None)
+    counters["chart_tickers"] = len(chart_tickers)
+    counters["chart_downloads_failed"] = sorted(name for name, frame in chart_data.items() if frame is None)
+
     # Build chart payloads with all timeframes
-    chart_payloads = build_chart_payloads(
-        chart_history, 
-        chart_tickers, 
-        data_15m=intraday_15m, 
-        data_1h=intraday_1h
+    # Incremental builds fingerprint the raw bars first and only build payloads
+    # for tickers whose outputs are out of date
+    bundle_paths = ["dist/data/charts/" + CHART_BUNDLE_INDEX_FILE, "dist/data/charts/" + CHART_BUNDLE_FILE]
+    with build_stage(metrics, "chart_build"):
+        chart_inputs = chart_input_fingerprints(chart_data, chart_tickers) if manifest["enabled"] else {}
+        if not manifest["enabled"]:
+            stale_tickers = chart_tickers
+        elif CHART_BUNDLE:
+            stale_tickers = [] if artifact_is_current(manifest, bundle_paths, chart_inputs) else chart_tickers
+        else:
+            stale_tickers = [
+                ticker for ticker in chart_tickers
+                if not artifact_is_current(manifest, f"dist/data/charts/{ticker}.json", chart_inputs[ticker])
+            ]
+        if PARQUET_EXPORT and not artifact_is_current(manifest, "dist/data/charts/ohlc.parquet", chart_inputs):
+            stale_tickers = chart_tickers
+        chart_payloads = build_chart_payloads(
+            chart_data["day"],
+            stale_tickers,
+            data_15m=chart_data["m15"],
+            data_1h=chart_data["h1"],
+        )
+    # Tickers with a chart on the site: just built, or unchanged since the last build
+    charted_tickers = set(chart_payloads) | (
+        _tickers_with_data(chart_data["day"], chart_tickers) - set(stale_tickers)
     )
-    write_chart_payloads(chart_payloads, "dist/data/charts")
-    print(f"   Charts: {len(chart_payloads)} tickers (with intraday data)")
+    counters["chart_payloads"] = len(chart_payloads)
+    counters["chart_unchanged"] = len(chart_tickers) - len(stale_tickers)
+    counters["chart_skipped"] = len(chart_tickers) - len(charted_tickers)
+    counters["chart_without_intraday"] = sum(1 for payload in chart_payloads.values() if not payload["m15"] and not payload["h1"])
+    with build_stage(metrics, "chart_write"):
+        if CHART_BUNDLE:
+            build_artifact(
+                manifest,
+                bundle_paths,
+                chart_inputs,
+                lambda: write_chart_bundle(chart_payloads, "dist/data/charts"),
+            )
+        else:
+            write_chart_payloads(chart_payloads, "dist/data/charts", manifest=manifest, fingerprints=chart_inputs or None)
+        print(f"   Charts: {len(charted_tickers)} tickers (with intraday data), {len(chart_payloads)} built")
+    chart_index_url = chart_bundle_index_url("dist/data/charts") if CHART_BUNDLE else None
 
 
     # Generate CSV files
     print("\n📁 Generating CSV files...")
-    generate_daily_csv(daily_gainers, "dist/data/daily/gainers.csv")
-    generate_daily_csv(daily_losers, "dist/data/daily/losers.csv")
-    generate_daily_csv(daily_sorted_all, "dist/data/daily/all_stocks.csv")
+    with build_stage(metrics, "csv"):
+        # Format each view once; gainers/losers are slices of the full ranking
+        for view, ranking, columns, headers in (
+            ("daily", daily_ranking, DAILY_COLUMNS, DAILY_CSV_HEADERS),
+            ("weekly", weekly_ranking, WEEKLY_COLUMNS, WEEKLY_CSV_HEADERS),
+        ):
+            header, rows = csv_rows(ranking["all"], columns, headers)
+            n_gainers, n_losers = len(ranking["gainers"]), len(ranking["losers"])
+            slices = {
+                f"dist/data/{view}/gainers.csv": (ranking["gainers"], rows[:n_gainers]),
+                f"dist/data/{view}/losers.csv": (ranking["losers"], rows[len(rows) - n_losers:][::-1]),
+                f"dist/data/{view}/all_stocks.csv": (ranking["all"], rows),
+            }
+            for path, (stocks, lines) in slices.items():
+                build_artifact(manifest, path, stocks, lambda: write_csv_rows(header, lines, path))
+
+    if PARQUET_EXPORT:
+        with build_stage(metrics, "parquet"):
+            parquet_tables = {
+                "dist/data/daily/all_stocks.parquet": (daily_sorted_all, DAILY_COLUMNS),
+                "dist/data/weekly/all_stocks.parquet": (weekly_sorted_all, WEEKLY_COLUMNS),
+            }
+            for path, (stocks, columns) in parquet_tables.items():
+                build_artifact(manifest, path, stocks, lambda: write_parquet(stocks_frame(stocks, columns), path))
+            build_artifact(
+                manifest,
+                "dist/data/charts/ohlc.parquet",
+                chart_inputs,
+                lambda: write_parquet(chart_ohlc_frame(chart_payloads), "dist/data/charts/ohlc.parquet"),
+            )
 
-    generate_weekly_csv(weekly_gainers, "dist/data/weekly/gainers.csv")
-    generate_weekly_csv(weekly_losers, "dist/data/weekly/losers.csv")
-    generate_weekly_csv(weekly_sorted_all, "dist/data/weekly/all_stocks.csv")
+    with build_stage(metrics, "search_index"):
+        search_index = build_search_index(universe["members"], daily_all_stocks, weekly_all_stocks, charted_tickers)
+        search_content = dumps_json(search_index)
+        search_version = hashlib.sha1(search_content).hexdigest()[:10]
+        search_path = f"dist/data/{SEARCH_INDEX_FILE}"
+        build_artifact(manifest, search_path, search_version, lambda: write_page_data(search_content, search_path))
+        dataset_urls = {"search": f"data/{SEARCH_INDEX_FILE}?v={search_version}"}
+    counters["search_symbols"] = len(search_index["symbols"])
+
+    with build_stage(metrics, "returns_outputs"):
+        build_artifact(
+            manifest,
+            ["dist/data/returns/returns.json", "dist/data/returns/all_stocks.csv"],
+            returns_windows,
+            lambda: generate_returns_outputs(returns_windows, "dist/data/returns"),
+        )
 
     # Generate HTML
     print("\n🎨 Generating HTML page...")
-    html = generate_html(
-        daily_gainers,
-        daily_losers,
-        daily_all_stocks,
-        daily_meta,
-        weekly_gainers,
-        weekly_losers,
-        weekly_all_stocks,
-        weekly_meta,
-        generated_at_et,
-    )
-    
-    with open('dist/index.html', 'w', encoding='utf-8') as f:
-        f.write(html)
-    print("   Generated dist/index.html")
-    
+    with build_stage(metrics, "html"):
+        write_static_assets("dist")
+
+        def write_html():
+            with open('dist/index.html', 'w', encoding='utf-8') as f:
+                stream_html(
+                    f,
+                    daily_gainers,
+                    daily_losers,
+                    daily_all_stocks,
+                    daily_meta,
+                    weekly_gainers,
+                    weekly_losers,
+                    weekly_all_stocks,
+                    weekly_meta,
+                    generated_at_et,
+                    universe_label=universe_label,
+                    chart_bundle=CHART_BUNDLE,
+                    dataset_urls=dataset_urls,
+                    chart_index_url=chart_index_url,
+                )
+            print("   Generated dist/index.html")
+
+        # The generation timestamp is not an input: unchanged data keeps the old page
+        build_artifact(
+            manifest,
+            "dist/index.html",
+            [
+                daily_gainers, daily_losers, daily_all_stocks, daily_meta,
+                weekly_gainers, weekly_losers, weekly_all_stocks, weekly_meta,
+                generated_at_et.weekday() >= 5, universe_label, CHART_BUNDLE, dataset_urls, chart_index_url,
+            ],
+            write_html,
+        )
+
     # Save JSON data for API-like access
     print("\n💾 Generating JSON data...")
-    with open('dist/data/data.json', 'w') as f:
-        json.dump(
-            {
-                "generated_at": generated_at_et.isoformat(),
-                "timezone": "America/New_York",
-                "daily": {
-                    "meta": daily_meta,
-                    "gainers": daily_gainers,
-                    "losers": daily_losers,
-                    "all_stocks": daily_sorted_all,
-                },
-                "weekly": {
-                    "meta": weekly_meta,
-                    "gainers": weekly_gainers,
-                    "losers": weekly_losers,
-                    "all_stocks": weekly_sorted_all,
-                },
+    with build_stage(metrics, "api_json"):
+        api_data = {
+            "generated_at": generated_at_et.isoformat(),
+            "timezone": "America/New_York",
+            "universe": {
+                "name": universe["name"],
+                "label": universe_label,
+                "size": len(universe_tickers),
+            },
+            "daily": {
+                "meta": daily_meta,
+                "gainers": daily_gainers,
+                "losers": daily_losers,
+                "all_stocks": daily_sorted_all,
             },
-            f,
-            indent=2,
+            "weekly": {
+                "meta": weekly_meta,
+                "gainers": weekly_gainers,
+                "losers": weekly_losers,
+                "all_stocks": weekly_sorted_all,
+            },
+        }
+
+        def write_api_data():
+            with open('dist/data/data.json', 'wb') as f:
+                f.write(dumps_json(api_data, indent=not COMPACT_JSON))
+            print("   Generated dist/data/data.json")
+
+        build_artifact(
+            manifest,
+            "dist/data/data.json",
+            [COMPACT_JSON, {key: value for key, value in api_data.items() if key != "generated_at"}],
+            write_api_data,
         )
-    print("   Generated dist/data/data.json")
+
+    save_build_manifest(manifest)
+
+    if PRECOMPRESS:
+        print("\n🗜️  Precompressing outputs...")
+        with build_stage(metrics, "precompress"):
+            precompress_outputs("dist")
+    if manifest["enabled"]:
+        print(f"\n♻️  Incremental build: {len(manifest['rebuilt'])} rebuilt, {len(manifest['skipped'])} unchanged")
+        for path in manifest["rebuilt"]:
+            print(f"   rebuilt {path}")
+        counters["artifacts_rebuilt"] = len(manifest["rebuilt"])
+        counters["artifacts_unchanged"] = len(manifest["skipped"])
+
+    metrics["downloads"] = list(DOWNLOAD_LOG)
+    counters["download_retries"] = sum(download["retries"] for download in DOWNLOAD_LOG)
+    counters["download_missing"] = sum(download["missing"] for download in DOWNLOAD_LOG)
+    metrics_path = write_build_metrics(metrics, "dist")
+    slowest = max(metrics["stages"], key=lambda stage: stage["seconds"])
+    print(f"\n⏱️  Build metrics written to {metrics_path} (slowest stage: {slowest['stage']}, {slowest['seconds']:.1f}s)")
     
     print("\n" + "=" * 60)
     print("✅ Site generated successfully!")
@@ -2080,11 +2440,15 @@ def main():
     print(f"   📄 index.html - Main page")
     print(f"   📊 data/daily/gainers.csv - Daily top gainers")
     print(f"   📊 data/daily/losers.csv - Daily top losers")
-    print(f"   📊 data/daily/all_stocks.csv - All S&P 500 (daily)")
+    print(f"   📊 data/daily/all_stocks.csv - All {universe_label} (daily)")
     print(f"   📊 data/weekly/gainers.csv - Weekly top gainers")
     print(f"   📊 data/weekly/losers.csv - Weekly top losers")
-    print(f"   📊 data/weekly/all_stocks.csv - All S&P 500 (weekly)")
+    print(f"   📊 data/weekly/all_stocks.csv - All {universe_label} (weekly)")
+    print(f"   📊 data/returns/returns.json - Movers per window (1D-52W)")
+    print(f"   📊 data/returns/all_stocks.csv - Returns per window, all {universe_label}")
     print(f"   📊 data/data.json - JSON API")
+    print(f"   🔎 data/{SEARCH_INDEX_FILE} - Search index ({len(search_index['symbols'])} symbols)")
+    print(f"   ⏱️  {BUILD_METRICS_FILE} - Stage timings and counters")
     print("=" * 60)
 
 
@@ -0,0 +1,72 @@
+"""The stdlib and orjson backends of dumps_json must encode the same values."""
+
+import json
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generate_site as site  # noqa: E402
+from benchmark import synthetic_market  # noqa: E402
+
+
+def _payloads():
+    """Every JSON document the build writes, from a small synthetic market."""
+    history = synthetic_market(40, 300)
+    tickers = list(history.columns.get_level_values(1).unique())
+    chart_tickers = tickers[:5]
+    # Same generator, so the intraday frames share the first five ticker names
+    data_15m = synthetic_market(5, 200, freq="15min", seed=1)
+    data_1h = synthetic_market(5, 300, freq="h", seed=2)
+
+    daily, daily_meta = site.build_daily_dataset(history.iloc[-site.DATASET_SESSIONS:])
+    charts = site.build_chart_payloads(history, chart_tickers, data_15m=data_15m, data_1h=data_1h)
+    returns = site.build_returns_dataset(history)
+    members = [{"symbol": ticker, "name": f"Company {ticker}", "sector": ""} for ticker in tickers]
+
+    return {
+        "chart_rows": [site._round_floats(payload) for payload in charts.values()],
+        "chart_columnar": [site.columnar_chart_payload(payload) for payload in charts.values()],
+        "returns": returns,
+        "search": site.build_search_index(members, daily, daily[:10], chart_tickers),
+        "data_json": {
+            "daily": {"meta": daily_meta, "all_stocks": daily},
+            # NumPy scalars and arrays, as produced by frame/array lookups
+            "numpy": {
+                "int": np.int64(42),
+                "float": np.float64(1.25),
+                "float32": np.float32(0.5),
+                "array": np.arange(3),
+            },
+        },
+    }
+
+
+class JsonBackendTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.payloads = _payloads()
+
+    def _roundtrip(self, backend, **kwargs):
+        return {
+            name: json.loads(site.dumps_json(payload, backend=backend, **kwargs))
+            for name, payload in self.payloads.items()
+        }
+
+    def test_stdlib_backend_roundtrips(self):
+        decoded = self._roundtrip("json")
+        self.assertEqual(decoded["data_json"]["numpy"], {"int": 42, "float": 1.25, "float32": 0.5, "array": [0, 1, 2]})
+        self.assertEqual(decoded, self._roundtrip("json", indent=True))
+
+    @unittest.skipIf(site.orjson is None, "orjson is not installed")
+    def test_backends_encode_equal_values(self):
+        expected = self._roundtrip("json")
+        self.assertEqual(self._roundtrip("orjson"), expected)
+        self.assertEqual(self._roundtrip("orjson", indent=True), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()